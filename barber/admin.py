@@ -1,13 +1,65 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
 from django import forms
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
 from django.utils.safestring import mark_safe
-from .models import Service, TimeSlot, Booking, OpeningHours, Review
+from .availability import invalidate_dates
+from .models import (
+    Service,
+    TimeSlot,
+    TimeSlotArchive,
+    Booking,
+    OpeningHours,
+    Review,
+)
 
-"""
-Admin configuration for the barber app.
-Registers the Service model in the Django admin interface.
-"""
-admin.site.register(Service)
+
+class ServiceAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the Service model.
+    Shows each service's stored rating summary next to its details,
+    loaded with a join rather than aggregated from the reviews.
+    """
+    list_display = (
+        "name",
+        "price",
+        "get_duration_display",
+        "average_rating",
+        "review_count",
+        "rating_histogram",
+    )
+    list_select_related = ("rating_summary",)
+    search_fields = ("name",)
+
+    def _summary(self, obj):
+        return getattr(obj, "rating_summary", None)
+
+    def average_rating(self, obj):
+        summary = self._summary(obj)
+        return summary.average if summary and summary.average else "-"
+    average_rating.short_description = "Average rating"
+
+    def review_count(self, obj):
+        summary = self._summary(obj)
+        return summary.review_count if summary else 0
+    review_count.short_description = "Reviews"
+
+    def rating_histogram(self, obj):
+        """Return the review counts per star, e.g. "5★ 3 · 4★ 1 · ..."."""
+        summary = self._summary(obj)
+        if not summary:
+            return "-"
+        return " · ".join(
+            f"{stars}★ {count}"
+            for stars, count in sorted(
+                summary.histogram.items(), reverse=True)
+        )
+    rating_histogram.short_description = "Ratings"
+
+
+admin.site.register(Service, ServiceAdmin)
 
 """
 Admin configuration for the barber app.
@@ -16,6 +68,41 @@ Registers the TimeSlot model in the Django admin panel.
 admin.site.register(TimeSlot)
 
 
+class TimeSlotArchiveAdmin(admin.ModelAdmin):
+    """
+    Read-only listing of timeslots pruned by the retention command.
+    """
+    list_display = ('date', 'start_time', 'end_time', 'status',
+                    'archived_at')
+    list_filter = ('status',)
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(TimeSlotArchive, TimeSlotArchiveAdmin)
+
+
+class AnnotatedChangeList(ChangeList):
+    """
+    Changelist that applies the admin's annotate_results() to the listed
+    rows only. Action and edit querysets stay unannotated, so they carry
+    no GROUP BY or extra joins.
+    """
+
+    def get_results(self, request):
+        queryset = self.queryset
+        self.queryset = self.model_admin.annotate_results(queryset)
+        try:
+            super().get_results(request)
+        finally:
+            self.queryset = queryset
+
+
 class BookingAdmin(admin.ModelAdmin):
     """
     Admin configuration for the Booking model.
@@ -30,6 +117,7 @@ class BookingAdmin(admin.ModelAdmin):
         "created_at",
     )
     list_filter = ("status", "created_at")
+    list_select_related = ("user", "service")
     search_fields = ("user__username", "service__name")
     actions = ["confirm_bookings", "decline_bookings"]
     filter_horizontal = ("timeslots",)
@@ -44,23 +132,76 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return AnnotatedChangeList
+
+    def annotate_results(self, queryset):
+        """
+        Annotate each listed booking's slot range and slot count, so the
+        changelist runs a fixed number of queries whatever the page size.
+        """
+        return queryset.with_time_bounds().annotate(
+            slot_count=Count("timeslots"))
+
     def display_timeslots(self, obj):
         """
-        Return a comma-separated string of dates and start times for each
-        timeslot associated with the booking.
+        Return the booking's date and time range with its slot count,
+        built from the annotated slot bounds.
         """
-        return ", ".join(
-            [f"{slot.date} {slot.start_time}" for slot in obj.timeslots.all()]
+        if not obj.get_date():
+            return "-"
+        return (
+            f"{obj.get_date()} {obj.get_time_range()} "
+            f"({obj.slot_count} slots)"
         )
     display_timeslots.short_description = "Time Slots"
+    display_timeslots.admin_order_field = "starts_at"
+
+    def locked_bookings(self, queryset):
+        """
+        Return the selected bookings locked FOR UPDATE. The lock is taken
+        on a plain pk filter: PostgreSQL rejects FOR UPDATE on a query
+        with GROUP BY or on the nullable side of an outer join, which the
+        changelist queryset may carry.
+        """
+        booking_ids = list(queryset.values_list("pk", flat=True))
+        return Booking.objects.select_for_update().filter(pk__in=booking_ids)
+
+    def _update_statuses(self, request, queryset, booking_status,
+                         slot_status, verb):
+        """
+        Set the status of the selected bookings and of all their timeslots
+        in one transaction, with one UPDATE per table, and report how many
+        rows changed.
+        """
+        with transaction.atomic():
+            booking_ids = list(
+                self.locked_bookings(queryset).values_list("pk", flat=True))
+            bookings = Booking.objects.filter(pk__in=booking_ids)
+            slots = TimeSlot.objects.filter(bookings__in=booking_ids)
+            dates = set(slots.values_list("date", flat=True))
+            dates.update(
+                timezone.localtime(starts_at).date()
+                for starts_at in bookings.exclude(
+                    starts_at=None).values_list("starts_at", flat=True)
+            )
+            booking_count = bookings.update(
+                status=booking_status, updated_at=timezone.now())
+            slot_count = slots.update(status=slot_status)
+            transaction.on_commit(lambda: invalidate_dates(dates))
+        self.message_user(
+            request,
+            f"{booking_count} booking(s) {verb}; {slot_count} time slot(s) "
+            f"marked {slot_status}.",
+            messages.SUCCESS,
+        )
 
     def confirm_bookings(self, request, queryset):
         """Confirm selected bookings by updating their status to confirmed
         and marking associated timeslots as booked.
         """
-        queryset.update(status="confirmed")
-        for booking in queryset:
-            booking.timeslots.update(status="booked")
+        self._update_statuses(
+            request, queryset, "confirmed", "booked", "confirmed")
 
     confirm_bookings.short_description = "Confirm selected bookings"
 
@@ -68,9 +209,8 @@ class BookingAdmin(admin.ModelAdmin):
         """Decline selected bookings by updating their status to cancelled
         and reverting associated timeslots to available.
         """
-        queryset.update(status="cancelled")
-        for booking in queryset:
-            booking.timeslots.update(status="available")
+        self._update_statuses(
+            request, queryset, "cancelled", "available", "declined")
 
     decline_bookings.short_description = "Decline selected bookings"
 
@@ -141,12 +281,30 @@ class ReviewAdmin(admin.ModelAdmin):
     Admin configuration for the Review model.
     Displays the booking, user, rating, and created_at fields.
     Provides filtering by rating and creation date, and enables searching
-    by username, service name, or comment content.
+    by username, service name, or comment content. The changelist joins
+    each review's booking, user and service and counts the booking's slots
+    in the same query.
     """
     form = ReviewAdminForm
-    list_display = ('booking', 'user', 'rating', 'created_at')
+    list_display = ('display_booking', 'user', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
+    list_select_related = ('booking__user', 'booking__service', 'user')
     search_fields = ('user__username', 'booking__service__name', 'comment')
 
+    def get_changelist(self, request, **kwargs):
+        return AnnotatedChangeList
+
+    def annotate_results(self, queryset):
+        return queryset.annotate(
+            booking_slot_count=Count('booking__timeslots'))
+
+    def display_booking(self, obj):
+        """Show the booking as Booking.__str__ would, without a query."""
+        obj.booking.slot_count = obj.booking_slot_count
+        return str(obj.booking)
+
+    display_booking.short_description = 'Booking'
+    display_booking.admin_order_field = 'booking'
+
 
 admin.site.register(Review, ReviewAdmin)
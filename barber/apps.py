@@ -1,6 +1,38 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def describe_database_connections():
+    """
+    Return a one-line summary of the effective connection settings of
+    each configured database, and log a warning for risky combinations.
+    """
+    parts = []
+    for alias, config in settings.DATABASES.items():
+        max_age = config.get('CONN_MAX_AGE', 0)
+        health_checks = config.get('CONN_HEALTH_CHECKS', False)
+        pooler = config.get('DISABLE_SERVER_SIDE_CURSORS', False)
+        parts.append(
+            f"{alias}: vendor={config.get('ENGINE', '').rsplit('.', 1)[-1]} "
+            f"conn_max_age={'unlimited' if max_age is None else max_age} "
+            f"health_checks={health_checks} external_pooler={pooler}"
+        )
+        if max_age != 0 and not health_checks:
+            logger.warning(
+                "Database %r keeps connections open without health checks; "
+                "a dropped connection will fail the next request.", alias)
+    return "; ".join(parts)
 
 
 class BarberConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'barber'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        logger.info("Database connections: %s",
+                    describe_database_connections())
@@ -0,0 +1,134 @@
+import json
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Booking, TimeSlot
+from .occupancy import bitmap_from_times, valid_starts
+
+"""
+Availability cache behind the booking page's availability API.
+Available start times are cached per date as pre-serialized JSON, so a
+request only queries the dates whose entries are missing or have been
+invalidated by a booking, an admin action or the timeslots command.
+"""
+
+CACHE_PREFIX = 'availability'
+# Per-day free intervals cached by barber.schedule.
+SCHEDULE_CACHE_PREFIX = 'schedule'
+
+
+def cache_key(day, prefix=CACHE_PREFIX):
+    """Return the cache key for a date under the given prefix."""
+    return f"{prefix}:{day.isoformat()}"
+
+
+def cache_timeout():
+    """Return how long cached availability entries live, in seconds."""
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300)
+
+
+def daterange(first, last):
+    """Yield every date from first to last inclusive."""
+    current = first
+    while current <= last:
+        yield current
+        current += timedelta(days=1)
+
+
+def slotless_bookings(window_start, window_end, exclude_booking=None):
+    """
+    Return the local (starts_at, ends_at) of non-cancelled bookings that
+    overlap the naive window but hold no TimeSlots. The interval engine
+    books without slots, so after switching back to the TimeSlot engine
+    its bookings are only visible through these columns.
+    """
+    bookings = (Booking.objects
+                .exclude(status='cancelled')
+                .filter(timeslots__isnull=True,
+                        starts_at__lt=timezone.make_aware(window_end),
+                        ends_at__gt=timezone.make_aware(window_start)))
+    if exclude_booking is not None and exclude_booking.pk:
+        bookings = bookings.exclude(pk=exclude_booking.pk)
+    return [
+        (timezone.localtime(starts_at).replace(tzinfo=None),
+         timezone.localtime(ends_at).replace(tzinfo=None))
+        for starts_at, ends_at in bookings.values_list('starts_at', 'ends_at')
+    ]
+
+
+def cached_start_times(days):
+    """
+    Return a dict mapping each date to the JSON list of its available
+    start times, e.g. '["09:00", "09:15"]'. Missing cache entries are
+    filled with a single range query over the uncached dates.
+    """
+    days = list(days)
+    keys = {cache_key(day): day for day in days}
+    cached = cache.get_many(keys.keys())
+    result = {keys[key]: value for key, value in cached.items()}
+
+    missing = [day for day in days if day not in result]
+    if missing:
+        start_times = {day: [] for day in missing}
+        slots = (TimeSlot.objects
+                 .filter(status='available', date__in=missing)
+                 .order_by('date', 'start_time')
+                 .values_list('date', 'start_time', 'end_time'))
+        held = slotless_bookings(
+            datetime.combine(min(missing), datetime.min.time()),
+            datetime.combine(max(missing) + timedelta(days=1),
+                             datetime.min.time()))
+        for slot_date, start_time, end_time in slots:
+            slot_start = datetime.combine(slot_date, start_time)
+            slot_end = datetime.combine(slot_date, end_time)
+            if any(slot_start < ends and slot_end > starts
+                   for starts, ends in held):
+                continue
+            start_times[slot_date].append(start_time.strftime("%H:%M"))
+        fresh = {day: json.dumps(times) for day, times in start_times.items()}
+        cache.set_many(
+            {cache_key(day): value for day, value in fresh.items()},
+            cache_timeout(),
+        )
+        result.update(fresh)
+    return result
+
+
+def valid_start_times(service_slots, first_day, last_day, today=None,
+                      now=None):
+    """
+    Return a dict mapping every date in the range to the start times
+    ("HH:MM") at which a service needing `service_slots` contiguous
+    15-minute slots can begin. Built from the cached per-date start
+    times, so a warm cache answers without touching the slot table, and
+    matched with occupancy bitmaps.
+    Start times on today that have already passed are dropped.
+    """
+    today = today or date.today()
+    now = (now or datetime.now().time()).strftime("%H:%M")
+    first_day = max(first_day, today)
+    result = {}
+    if first_day > last_day:
+        return result
+    cached = cached_start_times(daterange(first_day, last_day))
+    for day in sorted(cached):
+        bitmap = bitmap_from_times(json.loads(cached[day]))
+        starts = valid_starts(bitmap, service_slots)
+        if day == today:
+            starts = [start for start in starts if start > now]
+        result[day.isoformat()] = starts
+    return result
+
+
+def invalidate_dates(dates):
+    """Drop the cached availability and free intervals for the dates."""
+    keys = {
+        cache_key(day, prefix)
+        for day in dates
+        for prefix in (CACHE_PREFIX, SCHEDULE_CACHE_PREFIX)
+    }
+    if keys:
+        cache.delete_many(keys)
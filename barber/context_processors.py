@@ -0,0 +1,8 @@
+from .pagecache import ContentVersions
+
+
+def content_versions(request):
+    """
+    Expose the content versions used as template fragment cache keys.
+    """
+    return {'content_versions': ContentVersions()}
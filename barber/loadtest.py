@@ -0,0 +1,308 @@
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+
+"""
+HTTP load-test harness for the booking funnel, using only the standard
+library so it runs anywhere the site does. Each virtual user is a thread
+with its own cookie jar that browses the public pages anonymously, logs
+in, then repeatedly loads the booking form, asks the availability API
+for start times, books one of the earliest (so users contend for the
+same slots), checks the profile, cancels or reviews some bookings and
+finally logs out. Every request is timed per endpoint; redirects are not
+followed so each request is measured on its own. Run it with the
+loadtest management command, or directly:
+python -m barber.loadtest --base-url http://127.0.0.1:8000
+"""
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SERVICE_RE = re.compile(r'<option value="(\d+)"')
+CANCEL_RE = re.compile(r'href="/cancel/(\d+)/"')
+CREATE_REVIEW_RE = re.compile(r'href="/review/create/(\d+)/"')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def percentile(sorted_values, pct):
+    """Return the nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Stats:
+    """Thread-safe collection of request timings and booking outcomes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.errors = {}
+        self.bookings = {"accepted": 0, "rejected": 0}
+
+    def record(self, label, seconds, ok):
+        with self.lock:
+            self.timings.setdefault(label, []).append(seconds)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def record_booking(self, accepted):
+        with self.lock:
+            self.bookings["accepted" if accepted else "rejected"] += 1
+
+    def summary(self, elapsed):
+        """
+        Return {label: {requests, errors, rps, p50_ms, p95_ms, p99_ms}}
+        for every endpoint, sorted by label.
+        """
+        result = {}
+        for label in sorted(self.timings):
+            values = sorted(self.timings[label])
+            result[label] = {
+                "requests": len(values),
+                "errors": self.errors.get(label, 0),
+                "rps": round(len(values) / elapsed, 2) if elapsed else None,
+            }
+            for pct in (50, 95, 99):
+                value = percentile(values, pct)
+                result[label][f"p{pct}_ms"] = round(value * 1000, 1)
+        return result
+
+
+class Client:
+    """A browser-like session: cookies kept, redirects not followed."""
+
+    def __init__(self, base_url, stats, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect(),
+        )
+
+    def request(self, label, path, data=None):
+        """
+        Send a GET (or a form POST when `data` is given), time it under
+        `label` and return (status, body, redirect location).
+        """
+        url = self.base_url + path
+        body = None
+        headers = {}
+        if data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers["Referer"] = url
+        req = urllib.request.Request(url, data=body, headers=headers)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                status = response.status
+                content = response.read().decode("utf-8", "replace")
+                location = None
+        except urllib.error.HTTPError as error:
+            status = error.code
+            content = error.read().decode("utf-8", "replace")
+            location = error.headers.get("Location")
+        except (urllib.error.URLError, OSError):
+            status, content, location = 0, "", None
+        self.stats.record(label, time.perf_counter() - started,
+                          0 < status < 400)
+        return status, content, location
+
+
+class VirtualUser(threading.Thread):
+    """One simulated customer walking the booking funnel."""
+
+    def __init__(self, base_url, username, password, stats, iterations,
+                 booking_date, think_time=0.0, cancel_rate=0.3,
+                 review_rate=0.5, seed=None):
+        super().__init__(daemon=True)
+        self.client = Client(base_url, stats)
+        self.username = username
+        self.password = password
+        self.stats = stats
+        self.iterations = iterations
+        self.booking_date = booking_date
+        self.think_time = think_time
+        self.cancel_rate = cancel_rate
+        self.review_rate = review_rate
+        self.rng = random.Random(seed)
+
+    def pause(self):
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+
+    def csrf_post(self, label, path, form_body, data):
+        match = CSRF_RE.search(form_body)
+        data = dict(data, csrfmiddlewaretoken=match.group(1) if match else "")
+        return self.client.request(label, path, data)
+
+    def browse_anonymously(self):
+        for label, path in (("home", "/"), ("services", "/services/"),
+                            ("reviews", "/reviews/")):
+            self.client.request(label, path)
+            self.pause()
+
+    def login(self):
+        _, body, _ = self.client.request("login_form", "/accounts/login/")
+        status, _, _ = self.csrf_post(
+            "login", "/accounts/login/", body,
+            {"username": self.username, "password": self.password})
+        return status == 302
+
+    def book(self):
+        """Book one of the earliest free starts; return True if accepted."""
+        _, form, _ = self.client.request("book_now", "/book/")
+        services = SERVICE_RE.findall(form)
+        if not services:
+            return False
+        service = self.rng.choice(services)
+        query = urllib.parse.urlencode({
+            "service": service,
+            "start": self.booking_date.isoformat(),
+            "days": 1,
+        })
+        status, body, _ = self.client.request(
+            "availability", f"/book/availability/?{query}")
+        if status != 200:
+            return False
+        starts = json.loads(body)["dates"].get(
+            self.booking_date.isoformat(), [])
+        if not starts:
+            return False
+        # Aim at the first few starts so concurrent users collide.
+        start = self.rng.choice(starts[:3])
+        self.pause()
+        _, _, location = self.csrf_post(
+            "book_now_post", "/book/", form,
+            {"service": service, "date": self.booking_date.isoformat(),
+             "time": start})
+        accepted = bool(location) and "/accounts/profile/" in location
+        self.stats.record_booking(accepted)
+        return accepted
+
+    def manage_bookings(self):
+        _, profile, _ = self.client.request("profile", "/accounts/profile/")
+        cancellable = CANCEL_RE.findall(profile)
+        if cancellable and self.rng.random() < self.cancel_rate:
+            booking_id = self.rng.choice(cancellable)
+            self.client.request("booking_cancel", f"/cancel/{booking_id}/")
+        reviewable = CREATE_REVIEW_RE.findall(profile)
+        if reviewable and self.rng.random() < self.review_rate:
+            path = f"/review/create/{self.rng.choice(reviewable)}/"
+            _, form, _ = self.client.request("create_review_form", path)
+            self.csrf_post(
+                "create_review", path, form,
+                {"rating": self.rng.randint(1, 5),
+                 "comment": "Load test review"})
+
+    def run(self):
+        self.browse_anonymously()
+        if not self.login():
+            return
+        for _ in range(self.iterations):
+            self.book()
+            self.pause()
+            self.manage_bookings()
+            self.pause()
+        self.client.request("logout", "/accounts/logout/")
+
+
+def run_load(base_url, usernames, password, iterations=5, booking_date=None,
+             think_time=0.0, cancel_rate=0.3, review_rate=0.5, seed=0):
+    """
+    Run one virtual user per username concurrently and return a report
+    with the wall time, per-endpoint statistics and booking outcomes.
+    """
+    booking_date = booking_date or date.today() + timedelta(days=1)
+    stats = Stats()
+    users = [
+        VirtualUser(base_url, username, password, stats, iterations,
+                    booking_date, think_time, cancel_rate, review_rate,
+                    seed=f"{seed}-{index}")
+        for index, username in enumerate(usernames)
+    ]
+    started = time.perf_counter()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.perf_counter() - started
+    total = sum(len(values) for values in stats.timings.values())
+    return {
+        "base_url": base_url,
+        "users": len(users),
+        "iterations": iterations,
+        "booking_date": booking_date.isoformat(),
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "rps": round(total / elapsed, 2) if elapsed else None,
+        "endpoints": stats.summary(elapsed),
+        "bookings": dict(stats.bookings),
+    }
+
+
+def format_report(report):
+    """Return a report as a plain-text table."""
+    lines = [
+        f"{report['users']} users x {report['iterations']} iterations "
+        f"against {report['base_url']} in {report['elapsed_s']}s: "
+        f"{report['requests']} requests, {report['rps']} req/s",
+        f"{'endpoint':<20}{'reqs':>7}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+    ]
+    for label, row in report["endpoints"].items():
+        lines.append(
+            f"{label:<20}{row['requests']:>7}{row['errors']:>8}"
+            f"{row['rps']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+            f"{row['p99_ms']:>9}")
+    bookings = report["bookings"]
+    lines.append(
+        f"book_now_post: {bookings['accepted']} accepted, "
+        f"{bookings['rejected']} rejected")
+    if "double_booking" in report:
+        double = report["double_booking"]
+        lines.append(
+            f"book_now_post double-booking rate: {double['rate']:.2%} "
+            f"({double['bookings']} of {double['checked']} bookings)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load-test the booking funnel of a running site.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--prefix", default="load")
+    parser.add_argument("--password", default="loadtest")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    report = run_load(
+        args.base_url,
+        [f"{args.prefix}_{i}" for i in range(args.users)],
+        args.password,
+        iterations=args.iterations,
+        think_time=args.think_time,
+        seed=args.seed,
+    )
+    print(json.dumps(report, indent=2) if args.json
+          else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
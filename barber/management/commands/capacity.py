@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from barber import schedule
+from barber.availability import daterange
+from barber.models import Service
+from barber.occupancy import (
+    CELL_MINUTES,
+    bitmap_from_intervals,
+    load_bitmaps,
+    start_mask,
+)
+from barber.slots import required_slot_count
+
+
+class Command(BaseCommand):
+    """
+    Command to report booking capacity for the coming days: free hours
+    and the number of valid start times for every service, computed from
+    day occupancy bitmaps.
+    """
+
+    help = "Reports free hours and bookable start times per service."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=60,
+            help="Number of days to report on, starting today (default: 60)"
+        )
+        parser.add_argument(
+            "--per-day",
+            action="store_true",
+            help="Also print the start-time counts for each day."
+        )
+
+    def load_bitmaps(self, first_day, last_day):
+        """Return {date: free-cell bitmap} from the active engine."""
+        if schedule.is_enabled():
+            free = schedule.free_intervals(daterange(first_day, last_day))
+            return {
+                day: bitmap_from_intervals(intervals)
+                for day, intervals in free.items()
+            }
+        return load_bitmaps(first_day, last_day)
+
+    def handle(self, *args, **options):
+        first_day = date.today()
+        last_day = first_day + timedelta(days=options["days"] - 1)
+        bitmaps = self.load_bitmaps(first_day, last_day)
+
+        free_cells = sum(bin(bitmap).count("1") for bitmap in bitmaps.values())
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Capacity {first_day} to {last_day}: "
+            f"{free_cells * CELL_MINUTES / 60:.1f} free hours"
+        ))
+
+        for service in Service.objects.order_by("name"):
+            cells = required_slot_count(service)
+            per_day = {
+                day: bin(start_mask(bitmap, cells)).count("1")
+                for day, bitmap in sorted(bitmaps.items())
+            }
+            self.stdout.write(
+                f"{service.name} ({service.get_duration_display()}): "
+                f"{sum(per_day.values())} start times on "
+                f"{sum(1 for count in per_day.values() if count)} days"
+            )
+            if options["per_day"]:
+                for day, count in per_day.items():
+                    self.stdout.write(f"  {day}: {count}")
@@ -0,0 +1,85 @@
+from datetime import date, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from barber.models import Booking, Review, TimeSlot
+
+
+class Command(BaseCommand):
+    """
+    Command to print the database's query plan for each hot query issued
+    by barber/views.py and the cron jobs, to confirm the indexes are used.
+    """
+
+    help = "Prints EXPLAIN output for the hot booking and review queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE (PostgreSQL only)."
+        )
+        parser.add_argument(
+            "--user",
+            help="Username used for the per-user queries (default: first)."
+        )
+
+    def hot_queries(self, user):
+        """Return (label, queryset) pairs mirroring the views' queries."""
+        today = date.today()
+        horizon = [today + timedelta(days=offset) for offset in range(7)]
+        return [
+            ("availability cache fill (availability)",
+             TimeSlot.objects
+             .filter(status="available", date__in=horizon)
+             .order_by("date", "start_time")
+             .values_list("date", "start_time")),
+            ("contiguous slot search (book_now)",
+             TimeSlot.objects
+             .filter(date=today, start_time__gte=time(10, 0),
+                     start_time__lt=time(11, 0))
+             .order_by("start_time")),
+            ("slot claim (book_now)",
+             TimeSlot.objects.filter(pk__in=[1, 2, 3], status="available")),
+            ("user bookings (profile)",
+             Booking.objects
+             .filter(user=user)
+             .exclude(status="cancelled")
+             .select_related("service", "review")
+             .order_by("starts_at")),
+            ("user reviews (profile)",
+             Review.objects
+             .filter(user=user)
+             .select_related("booking__service")),
+            ("completion sweep (mark_completed)",
+             Booking.objects
+             .filter(status="confirmed")
+             .finished(timezone.now())),
+            ("first review page (reviews)",
+             Review.objects
+             .select_related("booking__service", "user")
+             .order_by("-created_at", "-pk")[:11]),
+        ]
+
+    def handle(self, *args, **options):
+        if options["user"]:
+            user = User.objects.get(username=options["user"])
+        else:
+            user = User.objects.order_by("pk").first() or User(pk=0)
+
+        explain_options = {}
+        if options["analyze"]:
+            if connection.vendor != "postgresql":
+                self.stdout.write(self.style.WARNING(
+                    "--analyze is only supported on PostgreSQL; ignoring."
+                ))
+            else:
+                explain_options = {"analyze": True, "buffers": True}
+
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+        for label, queryset in self.hot_queries(user):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
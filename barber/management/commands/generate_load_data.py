@@ -0,0 +1,347 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from barber.availability import invalidate_dates
+from barber.models import (
+    Booking,
+    OpeningHours,
+    Review,
+    Service,
+    ServiceRating,
+    TimeSlot,
+)
+from barber.pagecache import PAGES, REVIEWS, SERVICES, bump_content_version
+from barber.slots import SLOT_MINUTES, required_slot_count
+
+
+# Service lengths cycled through when generating services, in minutes.
+SERVICE_MINUTES = [30, 45, 60, 15, 90]
+
+# Slot status implied by each booking status.
+SLOT_STATUS = {
+    "pending": "pending",
+    "confirmed": "booked",
+    "completed": "booked",
+    "cancelled": "available",
+}
+
+
+class Command(BaseCommand):
+    """
+    Command to generate a deterministic benchmarking dataset with bulk
+    inserts: users, services, 15-minute timeslots for every day around
+    today driven by OpeningHours, contiguous bookings in every status and
+    reviews for completed bookings. Days are generated in chunks, each in
+    one transaction, so memory stays flat at a million slots.
+    """
+
+    help = "Generates a deterministic dataset for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=100,
+            help="Number of users to create (default: 100)")
+        parser.add_argument(
+            "--services", type=int, default=5,
+            help="Number of services to create (default: 5)")
+        parser.add_argument(
+            "--days", type=int, default=60,
+            help="Days of timeslots from today onwards (default: 60)")
+        parser.add_argument(
+            "--past-days", type=int, default=30,
+            help="Days of timeslots before today (default: 30)")
+        parser.add_argument(
+            "--fill", type=float, default=0.6,
+            help="Share of slot positions that start a booking "
+                 "(default: 0.6)")
+        parser.add_argument(
+            "--review-rate", type=float, default=0.5,
+            help="Share of completed bookings with a review (default: 0.5)")
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Random seed; the same seed gives the same data "
+                 "(default: 0)")
+        parser.add_argument(
+            "--prefix", default="load",
+            help="Prefix for generated usernames and service names "
+                 "(default: load)")
+        parser.add_argument(
+            "--password", default="loadtest",
+            help="Password of every generated user (default: loadtest)")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Rows inserted per query (default: 5000)")
+        parser.add_argument(
+            "--chunk-days", type=int, default=30,
+            help="Days generated per transaction (default: 30)")
+        parser.add_argument(
+            "--flush", action="store_true",
+            help="Delete previously generated users and services and the "
+                 "unbooked timeslots in the date range first.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        today = date.today()
+        first_day = today - timedelta(days=options["past_days"])
+        last_day = today + timedelta(days=options["days"] - 1)
+
+        if options["flush"]:
+            self.flush(prefix, first_day, last_day)
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(
+                f"Users prefixed '{prefix}_' exist; use --flush or "
+                "another --prefix.")
+        if TimeSlot.objects.filter(
+                date__gte=first_day, date__lte=last_day).exists():
+            raise CommandError(
+                f"Timeslots exist between {first_day} and {last_day}; "
+                "use --flush.")
+
+        grid = self.day_grid(self.opening_hours())
+        users = self.create_users(
+            prefix, options["users"], options["password"])
+        services = self.create_services(prefix, options["services"])
+        self.ratings = {service.pk: ServiceRating(service=service)
+                        for service in services}
+        totals = {"slots": 0, "bookings": 0, "reviews": 0}
+
+        day = first_day
+        while day <= last_day:
+            chunk_end = min(
+                day + timedelta(days=options["chunk_days"] - 1), last_day)
+            with transaction.atomic():
+                counts = self.generate_days(
+                    day, chunk_end, today, grid, users, services,
+                    options["fill"], options["review_rate"])
+            for key, value in counts.items():
+                totals[key] += value
+            day = chunk_end + timedelta(days=1)
+
+        ServiceRating.objects.bulk_create(self.ratings.values())
+        invalidate_dates(
+            first_day + timedelta(days=offset)
+            for offset in range((last_day - first_day).days + 1))
+        bump_content_version(PAGES, REVIEWS, SERVICES)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(users)} users, {len(services)} services, "
+            f"{totals['slots']} timeslots, {totals['bookings']} bookings "
+            f"and {totals['reviews']} reviews "
+            f"({first_day} to {last_day}, seed {options['seed']})."
+        ))
+
+    def flush(self, prefix, first_day, last_day):
+        """
+        Remove data left by an earlier run with the same prefix, then the
+        unbooked timeslots in the date range. Slots still held by other
+        bookings are kept, so the range check in handle() reports them.
+        """
+        User.objects.filter(username__startswith=f"{prefix}_").delete()
+        Service.objects.filter(name__startswith=f"{prefix} ").delete()
+        TimeSlot.objects.filter(
+            date__gte=first_day, date__lte=last_day,
+            bookings__isnull=True,
+        ).delete()
+
+    def opening_hours(self):
+        """
+        Return {weekday: (open, close)}, creating Monday to Saturday
+        09:00-18:00 when no opening hours are configured.
+        """
+        hours = {oh.day_of_week: (oh.open_time, oh.close_time)
+                 for oh in OpeningHours.objects.all()}
+        if not hours:
+            OpeningHours.objects.bulk_create([
+                OpeningHours(day_of_week=weekday, open_time=time(9),
+                             close_time=time(18))
+                for weekday in range(6)
+            ])
+            self.stdout.write("No opening hours found; created Mon-Sat "
+                              "09:00-18:00.")
+            hours = {weekday: (time(9), time(18)) for weekday in range(6)}
+        return hours
+
+    def create_users(self, prefix, count, password):
+        """Bulk-create users sharing one precomputed password hash."""
+        password_hash = make_password(password)
+        return User.objects.bulk_create(
+            [
+                User(username=f"{prefix}_{i}",
+                     email=f"{prefix}_{i}@example.com",
+                     password=password_hash)
+                for i in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def create_services(self, prefix, count):
+        """Bulk-create services of varying length and price."""
+        return Service.objects.bulk_create([
+            Service(
+                name=f"{prefix} service {i}",
+                duration=timedelta(
+                    minutes=SERVICE_MINUTES[i % len(SERVICE_MINUTES)]),
+                price=10 + 5 * i,
+            )
+            for i in range(count)
+        ])
+
+    def day_grid(self, hours):
+        """Return {weekday: [(start, end), ...]} of 15-minute slot times."""
+        grid = {}
+        for weekday, (open_time, close_time) in hours.items():
+            current = datetime.combine(date.min, open_time)
+            end = datetime.combine(date.min, close_time)
+            grid[weekday] = []
+            while current + timedelta(minutes=SLOT_MINUTES) <= end:
+                following = current + timedelta(minutes=SLOT_MINUTES)
+                grid[weekday].append((current.time(), following.time()))
+                current = following
+        return grid
+
+    def insert_rows(self, model, field_names, rows):
+        """
+        Insert rows of database-ready values with executemany. Used for
+        the slot, booking and link tables, where building model instances
+        would dominate the run time.
+        """
+        meta = model._meta
+        quote = connection.ops.quote_name
+        columns = ", ".join(
+            quote(meta.get_field(name).column) for name in field_names)
+        placeholders = ", ".join(["%s"] * len(field_names))
+        sql = (f"INSERT INTO {quote(meta.db_table)} ({columns}) "
+               f"VALUES ({placeholders})")
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[start:start + self.batch_size])
+
+    def pick_status(self, day, today):
+        """Return a plausible booking status for a booking on `day`."""
+        roll = self.rng.random()
+        if day < today:
+            return "cancelled" if roll < 0.1 else "completed"
+        if roll < 0.1:
+            return "cancelled"
+        return "pending" if roll < 0.4 else "confirmed"
+
+    def generate_days(self, first_day, last_day, today, grid, users,
+                      services, fill, review_rate):
+        """Generate slots, bookings and reviews for a range of days."""
+        ops = connection.ops
+        adapted_times = {
+            value: ops.adapt_timefield_value(value)
+            for times in grid.values() for pair in times for value in pair
+        }
+        slot_rows, bookings, held = [], [], []
+        day = first_day
+        while day <= last_day:
+            times = grid.get(day.weekday(), [])
+            statuses = ["available"] * len(times)
+            position = 0
+            while position < len(times):
+                service = self.rng.choice(services)
+                length = required_slot_count(service)
+                if (self.rng.random() >= fill
+                        or position + length > len(times)):
+                    position += 1
+                    continue
+                status = self.pick_status(day, today)
+                starts_at = timezone.make_aware(
+                    datetime.combine(day, times[position][0]))
+                bookings.append((
+                    self.rng.choice(users).pk,
+                    service.pk,
+                    status,
+                    starts_at,
+                    starts_at + timedelta(minutes=length * SLOT_MINUTES),
+                ))
+                held.append([(day, times[index][0])
+                             for index in range(position, position + length)])
+                for index in range(position, position + length):
+                    statuses[index] = SLOT_STATUS[status]
+                position += length
+            adapted_day = ops.adapt_datefield_value(day)
+            slot_rows.extend(
+                (adapted_day, adapted_times[start], adapted_times[end],
+                 status)
+                for (start, end), status in zip(times, statuses)
+            )
+            day += timedelta(days=1)
+
+        # Slot statuses are known before insertion, so every table is
+        # written once.
+        self.insert_rows(
+            TimeSlot, ["date", "start_time", "end_time", "status"],
+            slot_rows)
+        slot_ids = {
+            (slot_date, start): pk
+            for slot_date, start, pk in TimeSlot.objects.filter(
+                date__gte=first_day, date__lte=last_day,
+            ).values_list("date", "start_time", "pk")
+        }
+        now = ops.adapt_datetimefield_value(timezone.now())
+        self.insert_rows(
+            Booking,
+            ["user", "service", "status", "starts_at", "ends_at",
+             "created_at", "updated_at"],
+            [
+                (user_id, service_id, status,
+                 ops.adapt_datetimefield_value(starts_at),
+                 ops.adapt_datetimefield_value(ends_at), now, now)
+                for user_id, service_id, status, starts_at, ends_at
+                in bookings
+            ],
+        )
+        # Generated bookings never overlap, so the start identifies them.
+        # The service check is done here so the query stays on the
+        # starts_at index.
+        service_ids = {service.pk for service in services}
+        booking_ids = {
+            starts_at: pk
+            for starts_at, pk, service_id in Booking.objects.filter(
+                starts_at__gte=timezone.make_aware(
+                    datetime.combine(first_day, time())),
+                starts_at__lt=timezone.make_aware(
+                    datetime.combine(last_day + timedelta(days=1), time())),
+            ).values_list("starts_at", "pk", "service_id")
+            if service_id in service_ids
+        }
+        self.insert_rows(
+            Booking.timeslots.through, ["booking", "timeslot"],
+            [
+                (booking_ids[booking[3]], slot_ids[key])
+                for booking, block in zip(bookings, held)
+                for key in block
+            ],
+        )
+
+        reviews = []
+        for user_id, service_id, status, starts_at, _ in bookings:
+            if status != "completed" or self.rng.random() >= review_rate:
+                continue
+            rating = self.rng.randint(1, 5)
+            reviews.append(Review(
+                booking_id=booking_ids[starts_at], user_id=user_id,
+                rating=rating,
+                comment=f"Generated review {self.rng.randint(0, 10 ** 6)}",
+            ))
+            summary = self.ratings[service_id]
+            summary.review_count += 1
+            summary.rating_total += rating
+            field = ServiceRating.RATING_FIELDS[rating]
+            setattr(summary, field, getattr(summary, field) + 1)
+        Review.objects.bulk_create(reviews, batch_size=self.batch_size)
+
+        return {
+            "slots": len(slot_rows),
+            "bookings": len(bookings),
+            "reviews": len(reviews),
+        }
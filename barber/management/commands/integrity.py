@@ -1,44 +1,263 @@
+import json
+
 from django.core.management.base import BaseCommand
-from django.db.models import Count
-from barber.models import TimeSlot, Booking
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Max, Min, Q, When
+from barber import schedule
+from barber.availability import invalidate_dates
+from barber.models import Booking, Service, TimeSlot
+from barber.slots import SLOT_MINUTES, required_slot_count
+
+
+# Booking statuses whose timeslots are held, and the slot status each
+# one implies. Cancelled bookings keep their links but release the slots.
+HOLDING_STATUSES = {
+    "pending": "pending",
+    "confirmed": "booked",
+    "completed": "booked",
+}
+
+BookingSlot = Booking.timeslots.through
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
 
 
 class Command(BaseCommand):
-    help = "Checks database for duplicate timeslots and booking issues."
+    """
+    Command to check bookings and timeslots for inconsistencies. Every
+    check is an aggregate query over the booking/timeslot M2M table;
+    per-booking rows are streamed with iterator() so memory stays flat
+    on long histories. --fix repairs slot statuses; the other problems
+    are reported for a human to resolve.
+    """
+
+    help = ("Checks for duplicate timeslots, wrong or non-contiguous "
+            "booking slots, double-booked slots and slot statuses that "
+            "disagree with their booking.")
 
-    def handle(self, *args, **kwargs):
-        self.check_duplicates()
-        self.check_bookings()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the results as a JSON document."
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Reset slot statuses that disagree with their bookings."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows fetched per round trip when streaming (default: 2000)"
+        )
 
     def check_duplicates(self):
+        """Return timeslots sharing the same date, start and end."""
         duplicates = (TimeSlot.objects
                       .values("date", "start_time", "end_time")
                       .annotate(count=Count("id"))
-                      .filter(count__gt=1))
-        if duplicates.exists():
+                      .filter(count__gt=1)
+                      .order_by("date", "start_time"))
+        return [
+            {
+                "date": dup["date"].isoformat(),
+                "start_time": dup["start_time"].isoformat(),
+                "end_time": dup["end_time"].isoformat(),
+                "count": dup["count"],
+            }
+            for dup in duplicates
+        ]
+
+    def check_booking_slots(self, chunk_size):
+        """
+        Return (count_mismatches, non_contiguous) for every booking. While
+        the interval engine is enabled, bookings it made hold no slots and
+        carry starts_at, so those are skipped; any other booking without
+        slots is reported as a count mismatch.
+        """
+        expected = Case(
+            *[
+                When(service_id=service.pk,
+                     then=required_slot_count(service))
+                for service in Service.objects.all()
+            ],
+            default=0,
+            output_field=IntegerField(),
+        )
+        rows = (Booking.objects
+                .annotate(
+                    slot_count=Count("timeslots"),
+                    day_count=Count("timeslots__date", distinct=True),
+                    first_start=Min("timeslots__start_time"),
+                    last_end=Max("timeslots__end_time"),
+                    expected=expected,
+                )
+                .values_list("pk", "slot_count", "day_count",
+                             "first_start", "last_end", "expected")
+                .order_by("pk"))
+        if schedule.is_enabled():
+            rows = rows.exclude(slot_count=0, starts_at__isnull=False)
+
+        mismatches, non_contiguous = [], []
+        for pk, slot_count, day_count, first, last, expected_count in (
+                rows.iterator(chunk_size=chunk_size)):
+            if slot_count != expected_count:
+                mismatches.append({
+                    "booking": pk,
+                    "slots": slot_count,
+                    "expected": expected_count,
+                })
+            if not slot_count:
+                continue
+            span = _minutes(last) - _minutes(first)
+            if day_count != 1 or span != slot_count * SLOT_MINUTES:
+                non_contiguous.append({
+                    "booking": pk,
+                    "slots": slot_count,
+                    "days": day_count,
+                    "first_start": first.isoformat(),
+                    "last_end": last.isoformat(),
+                })
+        return mismatches, non_contiguous
+
+    def check_double_bookings(self):
+        """Return timeslots held by more than one booking."""
+        shared = (BookingSlot.objects
+                  .filter(booking__status__in=HOLDING_STATUSES)
+                  .values("timeslot_id")
+                  .annotate(count=Count("booking_id"))
+                  .filter(count__gt=1)
+                  .values_list("timeslot_id", flat=True))
+        holders = {}
+        for timeslot_id, booking_id in (
+                BookingSlot.objects
+                .filter(timeslot_id__in=shared,
+                        booking__status__in=HOLDING_STATUSES)
+                .order_by("timeslot_id", "booking_id")
+                .values_list("timeslot_id", "booking_id")):
+            holders.setdefault(timeslot_id, []).append(booking_id)
+        return [
+            {"timeslot": timeslot_id, "bookings": booking_ids}
+            for timeslot_id, booking_ids in holders.items()
+        ]
+
+    def wrong_status_filter(self):
+        """Return a Q matching M2M rows whose slot status is wrong."""
+        condition = Q()
+        for booking_status, slot_status in HOLDING_STATUSES.items():
+            condition |= (Q(booking__status=booking_status)
+                          & ~Q(timeslot__status=slot_status))
+        return condition
+
+    def check_slot_statuses(self, chunk_size):
+        """
+        Return (wrong_status, orphaned): slots whose status disagrees with
+        the booking holding them, and pending/booked slots that no
+        booking holds.
+        """
+        wrong = [
+            {
+                "timeslot": timeslot_id,
+                "status": slot_status,
+                "booking": booking_id,
+                "booking_status": booking_status,
+                "expected": HOLDING_STATUSES[booking_status],
+            }
+            for timeslot_id, slot_status, booking_id, booking_status in (
+                BookingSlot.objects
+                .filter(self.wrong_status_filter())
+                .order_by("timeslot_id")
+                .values_list("timeslot_id", "timeslot__status",
+                             "booking_id", "booking__status")
+                .iterator(chunk_size=chunk_size))
+        ]
+        orphaned = [
+            {"timeslot": pk, "status": status, "expected": "available"}
+            for pk, status in (
+                self.orphaned_slots()
+                .order_by("pk")
+                .values_list("pk", "status")
+                .iterator(chunk_size=chunk_size))
+        ]
+        return wrong, orphaned
+
+    def orphaned_slots(self):
+        """Return pending/booked slots no holding booking references."""
+        held = BookingSlot.objects.filter(
+            booking__status__in=HOLDING_STATUSES).values("timeslot_id")
+        return (TimeSlot.objects
+                .filter(status__in=("pending", "booked"))
+                .exclude(pk__in=held))
+
+    def fix_slot_statuses(self, double_booked):
+        """
+        Reset wrong slot statuses with one UPDATE per booking status and
+        release orphaned slots. Double-booked slots are left alone.
+        Returns the number of slots changed.
+        """
+        shared = [entry["timeslot"] for entry in double_booked]
+        fixed = 0
+        with transaction.atomic():
+            dates = set()
+            for booking_status, slot_status in HOLDING_STATUSES.items():
+                slots = (TimeSlot.objects
+                         .filter(bookings__status=booking_status)
+                         .exclude(status=slot_status)
+                         .exclude(pk__in=shared))
+                ids = list(slots.values_list("pk", flat=True).distinct())
+                dates.update(TimeSlot.objects.filter(
+                    pk__in=ids).values_list("date", flat=True))
+                fixed += TimeSlot.objects.filter(
+                    pk__in=ids).update(status=slot_status)
+            orphaned = self.orphaned_slots()
+            dates.update(orphaned.values_list("date", flat=True))
+            fixed += orphaned.update(status="available")
+            transaction.on_commit(lambda: invalidate_dates(dates))
+        return fixed
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        mismatches, non_contiguous = self.check_booking_slots(chunk_size)
+        double_booked = self.check_double_bookings()
+        wrong_status, orphaned = self.check_slot_statuses(chunk_size)
+        results = {
+            "duplicate_timeslots": self.check_duplicates(),
+            "slot_count_mismatches": mismatches,
+            "non_contiguous_bookings": non_contiguous,
+            "double_booked_timeslots": double_booked,
+            "wrong_slot_status": wrong_status,
+            "orphaned_slots": orphaned,
+        }
+        fixed = None
+        if options["fix"]:
+            fixed = self.fix_slot_statuses(double_booked)
+
+        if options["json"]:
+            document = {
+                "ok": not any(results.values()),
+                "checks": {
+                    name: {"count": len(items), "items": items}
+                    for name, items in results.items()
+                },
+            }
+            if fixed is not None:
+                document["fixed_slots"] = fixed
+            self.stdout.write(json.dumps(document, indent=2))
+            return
+
+        for name, items in results.items():
+            label = name.replace("_", " ")
+            if not items:
+                self.stdout.write(self.style.SUCCESS(f"No {label} found."))
+                continue
             self.stdout.write(self.style.WARNING(
-                "Found duplicate timeslots:"
-            ))
-            for dup in duplicates:
-                self.stdout.write(str(dup))
-        else:
-            self.stdout.write(self.style.SUCCESS(
-                "No duplicate timeslots found."
-            ))
-
-    def check_bookings(self):
-        issues = 0
-        for booking in Booking.objects.all():
-            slots = booking.timeslots.all().order_by("start_time")
-            expected_slots = int(
-                booking.service.duration.total_seconds() // 900)
-            if slots.count() != expected_slots:
-                issues += 1
-                self.stdout.write(self.style.WARNING(
-                    f"Booking {booking.id} has {slots.count()} slots, expected"
-                    f"{expected_slots}."
-                ))
-        if issues == 0:
+                f"Found {len(items)} {label}:"))
+            for item in items:
+                self.stdout.write(f"  {item}")
+        if fixed is not None:
             self.stdout.write(self.style.SUCCESS(
-                "All bookings have the correct number of timeslots."
-            ))
+                f"Slot statuses fixed: {fixed}"))
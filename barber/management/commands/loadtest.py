@@ -0,0 +1,111 @@
+import json
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+from barber.loadtest import format_report, run_load
+from barber.models import Booking
+
+
+# Booking statuses that hold their time.
+HOLDING_STATUSES = ("pending", "confirmed", "completed")
+
+
+class Command(BaseCommand):
+    """
+    Command to run the HTTP load-test harness (barber/loadtest.py)
+    against a running server, e.g. a local gunicorn sharing this
+    project's DATABASE_URL, with users created by generate_load_data.
+    After the run the database is checked for double bookings among the
+    bookings the run created.
+    """
+
+    help = ("Runs the booking-funnel load test against a running server "
+            "and reports throughput, latency percentiles and the "
+            "double-booking rate.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url", default="http://127.0.0.1:8000",
+            help="Server to test (default: http://127.0.0.1:8000)")
+        parser.add_argument(
+            "--users", type=int, default=10,
+            help="Concurrent virtual users (default: 10)")
+        parser.add_argument(
+            "--iterations", type=int, default=5,
+            help="Booking attempts per virtual user (default: 5)")
+        parser.add_argument(
+            "--prefix", default="load",
+            help="Username prefix used by generate_load_data "
+                 "(default: load)")
+        parser.add_argument(
+            "--password", default="loadtest",
+            help="Password of the generated users (default: loadtest)")
+        parser.add_argument(
+            "--days-ahead", type=int, default=1,
+            help="Book on the date this many days ahead (default: 1)")
+        parser.add_argument(
+            "--think-time", type=float, default=0.0,
+            help="Mean pause between requests in seconds (default: 0)")
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Random seed for the virtual users (default: 0)")
+        parser.add_argument(
+            "--no-db-check", action="store_true",
+            help="Skip the double-booking check, e.g. when the server "
+                 "uses another database.")
+        parser.add_argument(
+            "--json", action="store_true",
+            help="Print the report as a JSON document.")
+
+    def double_booking(self, since):
+        """
+        Return how many bookings created since `since` share a timeslot
+        or overlap in time with another booking holding its time.
+        """
+        created = Booking.objects.filter(
+            created_at__gte=since, status__in=HOLDING_STATUSES)
+        holders = Booking.timeslots.through.objects.filter(
+            booking__status__in=HOLDING_STATUSES)
+        shared = (holders
+                  .values("timeslot_id")
+                  .annotate(count=Count("booking_id"))
+                  .filter(count__gt=1)
+                  .values("timeslot_id"))
+        slot_clash = holders.filter(
+            booking_id=OuterRef("pk"), timeslot_id__in=shared)
+        time_clash = (Booking.objects
+                      .filter(status__in=HOLDING_STATUSES,
+                              starts_at__lt=OuterRef("ends_at"),
+                              ends_at__gt=OuterRef("starts_at"))
+                      .exclude(pk=OuterRef("pk")))
+        checked = created.count()
+        doubled = (created
+                   .filter(Exists(slot_clash) | Exists(time_clash))
+                   .count())
+        return {
+            "checked": checked,
+            "bookings": doubled,
+            "rate": doubled / checked if checked else 0.0,
+        }
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        report = run_load(
+            options["base_url"],
+            [f"{options['prefix']}_{i}" for i in range(options["users"])],
+            options["password"],
+            iterations=options["iterations"],
+            booking_date=date.today() + timedelta(
+                days=options["days_ahead"]),
+            think_time=options["think_time"],
+            seed=options["seed"],
+        )
+        if not options["no_db_check"]:
+            report["double_booking"] = self.double_booking(started)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from barber.models import Booking
+
+
+"""
+Management command to update booking statuses based on end datetime.
+
+Every confirmed booking is annotated with the date and end time of its
+last timeslot in one query, and all bookings that have already ended are
+switched to 'completed' with a single UPDATE.
+"""
+
+
+class Command(BaseCommand):
+    help = ("Mark confirmed bookings as completed if their booking end "
+            "time is in the past.")
+
+    def handle(self, *args, **kwargs):
+        now = timezone.now()
+        count = Booking.objects.mark_completed(now)
+        remaining = Booking.objects.filter(status='confirmed').count()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Total bookings updated: {count}")
+        )
+        self.stdout.write(
+            f"Confirmed bookings still upcoming: {remaining}"
+        )
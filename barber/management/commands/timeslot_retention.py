@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from barber.models import TimeSlot
+from barber.retention import (
+    expire_past_slots,
+    prunable_slots,
+    prune_slots,
+    retention_cutoff,
+    retention_days,
+)
+
+
+class Command(BaseCommand):
+    """
+    Command to keep the TimeSlot table bounded: past available slots are
+    marked expired and unbooked slots older than the retention window are
+    archived to TimeSlotArchive, or deleted with --delete.
+    """
+
+    help = "Expires past timeslots and archives or deletes old unbooked ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help=("Days of past timeslots kept in the live table "
+                  f"(default: TIMESLOT_RETENTION_DAYS, {retention_days()})")
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete old unbooked timeslots instead of archiving them."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of timeslots moved per transaction (default: 1000)"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing anything."
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = retention_cutoff(timezone.localdate(now), options["days"])
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Dry run: {prunable_slots(cutoff).count()} unbooked "
+                f"timeslots before {cutoff} would be "
+                f"{'deleted' if options['delete'] else 'archived'}."
+            )
+            return
+
+        expired = expire_past_slots(now)
+        removed = prune_slots(
+            cutoff,
+            archive=not options["delete"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Timeslots expired: {expired}; "
+            f"{'deleted' if options['delete'] else 'archived'} "
+            f"before {cutoff}: {removed}"
+        ))
+        self.stdout.write(
+            f"Timeslots in live table: {TimeSlot.objects.count()}"
+        )
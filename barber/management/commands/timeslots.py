@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from barber.availability import invalidate_dates
 from barber.models import OpeningHours, TimeSlot
 from datetime import date, datetime, timedelta
 
@@ -6,6 +7,9 @@ from datetime import date, datetime, timedelta
 class Command(BaseCommand):
     """
     Command to generate 15-min timeslots for future days.
+    Opening hours are loaded once, the slot grid is computed in memory,
+    diffed against the existing rows with one range query and inserted
+    with batched bulk_create calls.
     """
 
     help = (
@@ -15,7 +19,7 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         """
-        Add argument for the number of days to generate timeslots.
+        Add arguments for the number of days, batch size and output mode.
         """
         parser.add_argument(
             "--days",
@@ -24,28 +28,42 @@ class Command(BaseCommand):
             help=("Number of future days to generate timeslots "
                   "(default: 7)")
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of timeslots inserted per query (default: 1000)"
+        )
+        parser.add_argument(
+            "--quiet",
+            action="store_true",
+            help="Only print the summary line."
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be created without writing anything."
+        )
 
-    def handle(self, *args, **options):
+    def build_grid(self, today, days):
         """
-        Main handler that creates timeslots.
+        Return the (date, start_time, end_time) tuples for every 15-min
+        slot inside the opening hours of the next `days` days.
         """
-        days = options["days"]
-        today = date.today()
-        created_count = 0
-
+        hours = {oh.day_of_week: oh for oh in OpeningHours.objects.all()}
+        grid = []
         for day_offset in range(days):
             current_date = today + timedelta(days=day_offset)
             weekday = current_date.weekday()  # 0=Mon, 6=Sun
-
-            try:
-                oh = OpeningHours.objects.get(day_of_week=weekday)
-            except OpeningHours.DoesNotExist:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f"No opening hours for {current_date} (wd "
-                        f"{weekday}). Skipping."
+            oh = hours.get(weekday)
+            if oh is None:
+                if self.verbose:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"No opening hours for {current_date} (wd "
+                            f"{weekday}). Skipping."
+                        )
                     )
-                )
                 continue
 
             start_dt = datetime.combine(current_date, oh.open_time)
@@ -53,26 +71,60 @@ class Command(BaseCommand):
 
             # Create 15-min slots if time permits.
             while start_dt + timedelta(minutes=15) <= end_dt:
-                slot_start = start_dt.time()
-                slot_end = (start_dt + timedelta(minutes=15)).time()
+                slot_end = start_dt + timedelta(minutes=15)
+                grid.append(
+                    (current_date, start_dt.time(), slot_end.time()))
+                start_dt = slot_end
+        return grid
 
-                ts, created = TimeSlot.objects.get_or_create(
-                    date=current_date,
-                    start_time=slot_start,
-                    end_time=slot_end,
-                    defaults={"status": "available"}
+    def handle(self, *args, **options):
+        """
+        Main handler that creates timeslots.
+        """
+        days = options["days"]
+        dry_run = options["dry_run"]
+        self.verbose = not options["quiet"]
+        today = date.today()
+
+        grid = self.build_grid(today, days)
+        existing = set(
+            TimeSlot.objects.filter(
+                date__gte=today, date__lt=today + timedelta(days=days)
+            ).values_list("date", "start_time", "end_time")
+        )
+        new_slots = [
+            TimeSlot(date=slot_date, start_time=start, end_time=end,
+                     status="available")
+            for slot_date, start, end in grid
+            if (slot_date, start, end) not in existing
+        ]
+
+        if self.verbose:
+            for slot in new_slots:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{'Would create' if dry_run else 'Created'} timeslot "
+                    f"on {slot.date}:\n{slot.start_time} - {slot.end_time}"
+                ))
+
+        if dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Dry run: {len(new_slots)} new timeslots would be "
+                    f"created, {len(grid) - len(new_slots)} already exist."
                 )
-                if created:
-                    created_count += 1
-                    msg = (
-                        f"Created timeslot on {current_date}:\n"
-                        f"{slot_start} - {slot_end}"
-                    )
-                    self.stdout.write(self.style.SUCCESS(msg))
-                start_dt += timedelta(minutes=15)
+            )
+            return
 
+        # ignore_conflicts keeps concurrent runs from failing on the
+        # unique (date, start_time, end_time) constraint.
+        TimeSlot.objects.bulk_create(
+            new_slots,
+            batch_size=options["batch_size"],
+            ignore_conflicts=True,
+        )
+        invalidate_dates({slot.date for slot in new_slots})
         self.stdout.write(
             self.style.SUCCESS(
-                f"Total new timeslots created: {created_count}"
+                f"Total new timeslots created: {len(new_slots)}"
             )
         )
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barber', '0008_alter_booking_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from django.db import migrations
+from django.db.models import Max, Min
+from django.utils import timezone
+
+
+def backfill_time_bounds(apps, schema_editor):
+    """Fill starts_at/ends_at for existing bookings from their slots."""
+    Booking = apps.get_model('barber', 'Booking')
+    rows = (Booking.objects
+            .values('pk')
+            .annotate(slot_date=Max('timeslots__date'),
+                      first_start=Min('timeslots__start_time'),
+                      last_end=Max('timeslots__end_time'))
+            .filter(slot_date__isnull=False))
+    bookings = [
+        Booking(
+            pk=row['pk'],
+            starts_at=timezone.make_aware(
+                datetime.combine(row['slot_date'], row['first_start'])),
+            ends_at=timezone.make_aware(
+                datetime.combine(row['slot_date'], row['last_end'])),
+        )
+        for row in rows
+    ]
+    Booking.objects.bulk_update(bookings, ['starts_at', 'ends_at'],
+                                batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barber', '0009_booking_time_bounds'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_time_bounds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barber', '0010_backfill_booking_time_bounds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'status'], name='booking_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'starts_at'], name='booking_user_starts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'ends_at'], name='booking_status_ends_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(fields=['status', 'date', 'start_time'], name='timeslot_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(condition=models.Q(('status', 'available')), fields=['date', 'start_time'], name='timeslot_available_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_service_ratings(apps, schema_editor):
+    """Build the rating summaries from the existing reviews."""
+    Review = apps.get_model('barber', 'Review')
+    ServiceRating = apps.get_model('barber', 'ServiceRating')
+    summaries = {}
+    rows = (Review.objects
+            .values('booking__service_id', 'rating')
+            .annotate(count=Count('id'))
+            .order_by())
+    for row in rows:
+        service_id = row['booking__service_id']
+        summary = summaries.setdefault(
+            service_id, ServiceRating(service_id=service_id))
+        summary.review_count += row['count']
+        summary.rating_total += row['count'] * row['rating']
+        field = f"rating_{row['rating']}"
+        setattr(summary, field, getattr(summary, field) + row['count'])
+    ServiceRating.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barber', '0012_review_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='barber.service')),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_service_ratings, migrations.RunPython.noop),
+    ]
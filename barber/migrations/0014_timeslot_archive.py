@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barber', '0013_service_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeSlotArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('status', models.CharField(choices=[('available', 'Available'), ('pending', 'Pending'), ('booked', 'Booked'), ('expired', 'Expired')], max_length=10)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from datetime import datetime
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -74,6 +74,43 @@ class TimeSlot(models.Model):
     class Meta:
         ordering = ['date', 'start_time']
         unique_together = ('date', 'start_time', 'end_time')
+        indexes = [
+            models.Index(
+                fields=['status', 'date', 'start_time'],
+                name='timeslot_status_date_idx',
+            ),
+            # Availability lookups only ever read free slots.
+            models.Index(
+                fields=['date', 'start_time'],
+                condition=models.Q(status='available'),
+                name='timeslot_available_idx',
+            ),
+        ]
+
+
+"""
+TimeSlotArchive model keeps a copy of unbooked timeslots pruned from the
+live TimeSlot table by the timeslot_retention command, so the live table
+stays bounded to the booking horizon. Booked slots are never archived;
+they stay reachable through their bookings.
+"""
+
+
+class TimeSlotArchive(models.Model):
+    date = models.DateField(db_index=True)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    status = models.CharField(
+        max_length=10, choices=TimeSlot.STATUS_CHOICES
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return (f"{self.date} {self.start_time} - {self.end_time} "
+                f"({self.status}, archived)")
+
+    class Meta:
+        ordering = ['date', 'start_time']
 
 
 """
@@ -120,6 +157,75 @@ class OpeningHours(models.Model):
         verbose_name = "Opening Hour"
 
 
+def slot_datetimes(slot_date, first_start, last_end):
+    """
+    Combine a booking's slot date, first start and last end time into
+    aware (starts_at, ends_at) datetimes, or (None, None) without slots.
+    """
+    if slot_date is None:
+        return None, None
+    return (
+        timezone.make_aware(datetime.combine(slot_date, first_start)),
+        timezone.make_aware(datetime.combine(slot_date, last_end)),
+    )
+
+
+class BookingQuerySet(models.QuerySet):
+    """Set-based queries over bookings and their time slots."""
+
+    def with_time_bounds(self):
+        """
+        Annotate each booking with the date of its slots and the first
+        start and last end time as `slot_date`, `first_start` and
+        `last_end`, so the Booking time accessors need no extra queries.
+        A booking's slots share one date.
+        """
+        return self.annotate(
+            slot_date=models.Max('timeslots__date'),
+            first_start=models.Min('timeslots__start_time'),
+            last_end=models.Max('timeslots__end_time'),
+        )
+
+    def finished(self, now=None):
+        """Return bookings whose last slot ended before `now`."""
+        return self.filter(ends_at__lt=now or timezone.now())
+
+    def refresh_time_bounds(self):
+        """
+        Recompute the denormalized starts_at/ends_at columns of every
+        booking in the queryset from its current slots. Uses one
+        aggregate query and one bulk update.
+        """
+        # Re-select by pk so filters on timeslots cannot narrow the
+        # aggregates below.
+        bookings_qs = self.model.objects.filter(pk__in=self.values('pk'))
+        bounds = {
+            row['pk']: row
+            for row in bookings_qs.values('pk').annotate(
+                slot_date=models.Max('timeslots__date'),
+                first_start=models.Min('timeslots__start_time'),
+                last_end=models.Max('timeslots__end_time'),
+            )
+        }
+        bookings = []
+        for pk, row in bounds.items():
+            booking = self.model(pk=pk)
+            booking.starts_at, booking.ends_at = slot_datetimes(
+                row['slot_date'], row['first_start'], row['last_end'])
+            bookings.append(booking)
+        return self.model.objects.bulk_update(
+            bookings, ['starts_at', 'ends_at'])
+
+    def mark_completed(self, now=None):
+        """
+        Flip every finished confirmed booking in the queryset to completed
+        with a single UPDATE and return the number of rows changed.
+        """
+        return self.filter(status='confirmed').finished(now).update(
+            status='completed', updated_at=timezone.now()
+        )
+
+
 """
 Booking model for managing user appointments.
 Links a User, a Service, and selected TimeSlots.
@@ -149,50 +255,47 @@ class Booking(models.Model):
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default='pending'
     )
+    # Denormalized from the timeslots, kept in sync by barber.signals.
+    starts_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
+    ends_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
+
+    objects = BookingQuerySet.as_manager()
 
     def clean(self):
         """
         Validate that the booking has contiguous time slots that match
-        the service duration. Also, ensure that all selected time slots
-        are available, or if not available, already belong to this booking.
+        the service duration. Slots attached to the booking count as
+        available to it, so only the count and contiguity are checked.
         """
-        total_required_minutes = (
-            self.service.duration.total_seconds() / 60
-        )
-        required_slots = int(total_required_minutes / 15)
-        if self.pk and self.timeslots.exists():
-            if self.timeslots.count() != required_slots:
-                raise ValidationError(
-                    f"{self.service.name} requires {required_slots * 15} "
-                    f"minutes. Please select exactly {required_slots} "
-                    f"contiguous 15-minute slots."
-                )
-            # Order the time slots by start_time for contiguous check.
-            slots = list(self.timeslots.all().order_by('start_time'))
-            if not slots:
-                raise ValidationError("No time slots selected.")
-            for i in range(1, len(slots)):
-                prev_end = datetime.combine(slots[i - 1].date,
-                                            slots[i - 1].end_time)
-                current_start = datetime.combine(slots[i].date,
-                                                 slots[i].start_time)
-                if current_start != prev_end:
-                    raise ValidationError(
-                        "Selected time slots are not contiguous.")
-            for slot in slots:
-                if slot.status != 'available':
-                    # Allow the slot if it belongs to this booking.
-                    if self.pk and slot.bookings.filter(pk=self.pk).exists():
-                        continue
-                    raise ValidationError(
-                        "One or more selected time slots are not available."
-                    )
+        from .slots import required_slot_count, slots_are_contiguous
+
+        if not self.pk:
+            return
+        required_slots = required_slot_count(self.service)
+        # Load the slots in one query instead of count/exists/first.
+        slots = list(self.timeslots.all().order_by('date', 'start_time'))
+        if not slots:
+            return
+        if len(slots) != required_slots:
+            raise ValidationError(
+                f"{self.service.name} requires {required_slots * 15} "
+                f"minutes. Please select exactly {required_slots} "
+                f"contiguous 15-minute slots."
+            )
+        if not slots_are_contiguous(slots):
+            raise ValidationError(
+                "Selected time slots are not contiguous.")
 
     def save(self, *args, **kwargs):
         """
         Save booking and update time slot statuses accordingly.
         Mark time slots as pending on booking creation, update to booked
-        on confirmation, or revert to available on cancellation.
+        on confirmation, or revert to available on cancellation, and drop
+        the cached availability for the affected dates.
         """
         if self.status in ['pending', 'confirmed']:
             self.full_clean()
@@ -205,23 +308,77 @@ class Booking(models.Model):
             self.timeslots.update(status='booked')
         elif self.status == 'cancelled':
             self.timeslots.update(status='available')
+        else:
+            return
+
+        from .availability import invalidate_dates
+        dates = set(self.timeslots.values_list('date', flat=True))
+        if self.starts_at:
+            dates.add(timezone.localtime(self.starts_at).date())
+        transaction.on_commit(lambda: invalidate_dates(dates))
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'status'], name='booking_user_status_idx'),
+            models.Index(
+                fields=['user', 'starts_at'], name='booking_user_starts_idx'),
+            models.Index(
+                fields=['status', 'ends_at'], name='booking_status_ends_idx'),
+        ]
 
     def __str__(self):
         if not self.pk:
             return f"{self.user.username} - {self.service.name}"
-        try:
-            count = self.timeslots.count()
-        except Exception:
-            count = 0
+        if hasattr(self, 'slot_count'):
+            count = self.slot_count
+        else:
+            try:
+                count = self.timeslots.count()
+            except Exception:
+                count = 0
         return (
             f"{self.user.username} - {self.service.name} "
             f"({count} slots)"
         )
 
+    def get_time_bounds(self):
+        """
+        Return (date, first start time, last end time) for the booking's
+        slots, or None if it has none. Reads the starts_at/ends_at
+        columns, then the with_time_bounds() annotations or prefetched
+        timeslots, and only falls back to a single aggregate query.
+        """
+        if self.starts_at and self.ends_at:
+            starts_at = timezone.localtime(self.starts_at)
+            ends_at = timezone.localtime(self.ends_at)
+            return starts_at.date(), starts_at.time(), ends_at.time()
+        if hasattr(self, 'first_start'):
+            if self.slot_date is None:
+                return None
+            return self.slot_date, self.first_start, self.last_end
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'timeslots' in prefetched:
+            slots = sorted(
+                prefetched['timeslots'],
+                key=lambda slot: (slot.date, slot.start_time),
+            )
+            if not slots:
+                return None
+            return slots[0].date, slots[0].start_time, slots[-1].end_time
+        bounds = self.timeslots.aggregate(
+            slot_date=models.Max('date'),
+            first_start=models.Min('start_time'),
+            last_end=models.Max('end_time'),
+        )
+        if bounds['slot_date'] is None:
+            return None
+        return bounds['slot_date'], bounds['first_start'], bounds['last_end']
+
     def get_date(self):
         """Return the booking date from the earliest timeslot."""
-        slots = self.timeslots.all().order_by('start_time')
-        return slots.first().date if slots.exists() else None
+        bounds = self.get_time_bounds()
+        return bounds[0] if bounds else None
 
     # Method to get the overall time range of the booking.
     def get_time_range(self):
@@ -229,11 +386,11 @@ class Booking(models.Model):
         Return a string representing the time range from the earliest start
         time to the latest end time, e.g., "10:00 - 10:45".
         """
-        slots = self.timeslots.all().order_by('start_time')
-        if not slots.exists():
+        bounds = self.get_time_bounds()
+        if not bounds:
             return ""
-        start_time = slots.first().start_time.strftime("%H:%M")
-        end_time = slots.last().end_time.strftime("%H:%M")
+        start_time = bounds[1].strftime("%H:%M")
+        end_time = bounds[2].strftime("%H:%M")
         return f"{start_time} - {end_time}"
 
     def get_end_datetime(self):
@@ -242,12 +399,25 @@ class Booking(models.Model):
         based on the last timeslot's end time. If no timeslots exist,
         return None.
         """
-        slots = self.timeslots.all().order_by('start_time')
-        if slots.exists():
-            last_slot = slots.last()
-            naive_dt = datetime.combine(last_slot.date, last_slot.end_time)
-            return timezone.make_aware(naive_dt)
-        return None
+        if self.ends_at:
+            return self.ends_at
+        bounds = self.get_time_bounds()
+        if not bounds:
+            return None
+        return slot_datetimes(*bounds)[1]
+
+    @property
+    def effective_status(self):
+        """
+        Return the status as shown to the customer: a confirmed booking
+        that has already ended reads as completed even before the
+        mark_completed sweep has persisted it.
+        """
+        if self.status == 'confirmed':
+            end_dt = self.get_end_datetime()
+            if end_dt and end_dt < timezone.now():
+                return 'completed'
+        return self.status
 
 
 """
@@ -275,6 +445,12 @@ class Review(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     ratings = GenericRelation(StarRating, related_query_name='ratings')
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'], name='review_created_idx'),
+        ]
+
     def clean(self):
         """
         Validate that rating is between 1 and 5.
@@ -287,3 +463,75 @@ class Review(models.Model):
             f"Review for {self.booking.service.name} by "
             f"{self.user.username}"
         )
+
+
+"""
+ServiceRating model stores a running summary of the reviews for one
+service: the review count, the sum of ratings and a 1-5 histogram.
+It is kept up to date incrementally by signal handlers, so the services
+page never aggregates the Review table.
+"""
+
+
+class ServiceRating(models.Model):
+    service = models.OneToOneField(
+        Service, on_delete=models.CASCADE, related_name="rating_summary"
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    RATING_FIELDS = {
+        1: 'rating_1',
+        2: 'rating_2',
+        3: 'rating_3',
+        4: 'rating_4',
+        5: 'rating_5',
+    }
+
+    @classmethod
+    def apply(cls, service_id, rating, delta):
+        """
+        Add (delta=1) or remove (delta=-1) one review with the given
+        rating from a service's summary using an atomic F() update.
+        Raise ValueError for a rating outside 1-5.
+        """
+        rating_field = cls.RATING_FIELDS.get(rating)
+        if rating_field is None:
+            raise ValueError(
+                f"Rating must be between 1 and 5, not {rating!r}.")
+        changes = {
+            'review_count': models.F('review_count') + delta,
+            'rating_total': models.F('rating_total') + delta * rating,
+            rating_field: models.F(rating_field) + delta,
+        }
+        if not cls.objects.filter(service_id=service_id).update(**changes):
+            if delta < 0:
+                return
+            cls.objects.get_or_create(service_id=service_id)
+            cls.objects.filter(service_id=service_id).update(**changes)
+
+    @property
+    def average(self):
+        """Return the mean rating, or None without reviews."""
+        if not self.review_count:
+            return None
+        return round(self.rating_total / self.review_count, 1)
+
+    @property
+    def histogram(self):
+        """Return review counts per rating as {1: n, ..., 5: n}."""
+        return {
+            rating: getattr(self, field)
+            for rating, field in self.RATING_FIELDS.items()
+        }
+
+    def __str__(self):
+        return (
+            f"{self.service.name}: {self.average or '-'} "
+            f"({self.review_count} reviews)"
+        )
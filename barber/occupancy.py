@@ -0,0 +1,91 @@
+from datetime import datetime, time
+
+from .models import TimeSlot
+
+"""
+Day occupancy bitmaps.
+Each day is an integer whose bit i is set when the 15-minute cell that
+starts i * 15 minutes after midnight is free. The valid start cells for
+a service of n cells are the bits that begin a run of n free cells, found
+with a handful of shift-and-AND operations instead of per-slot checks.
+"""
+
+CELL_MINUTES = 15
+CELLS_PER_DAY = 24 * 60 // CELL_MINUTES
+
+
+def cell_index(value):
+    """Return the cell index of a time of day."""
+    return (value.hour * 60 + value.minute) // CELL_MINUTES
+
+
+def cell_time(index):
+    """Return the start time of a cell as "HH:MM"."""
+    minutes = index * CELL_MINUTES
+    return time(minutes // 60, minutes % 60).strftime("%H:%M")
+
+
+def bitmap_from_times(times):
+    """Build a bitmap from start times given as "HH:MM" or time objects."""
+    bitmap = 0
+    for value in times:
+        if isinstance(value, str):
+            value = datetime.strptime(value, "%H:%M").time()
+        bitmap |= 1 << cell_index(value)
+    return bitmap
+
+
+def bitmap_from_intervals(intervals):
+    """Build a bitmap from (start, end) minute pairs, e.g. an IntervalSet."""
+    bitmap = 0
+    for start, end in intervals:
+        first = -(-start // CELL_MINUTES)
+        last = end // CELL_MINUTES
+        if last > first:
+            bitmap |= ((1 << (last - first)) - 1) << first
+    return bitmap
+
+
+def start_mask(bitmap, cells):
+    """
+    Return a bitmap of the cells that begin a run of `cells` free cells.
+    Doubling the window each step needs O(log cells) shift-and-ANDs.
+    """
+    if cells < 1:
+        return 0
+    mask = bitmap
+    covered = 1
+    while covered < cells:
+        step = min(covered, cells - covered)
+        mask &= mask >> step
+        covered += step
+    return mask
+
+
+def set_bits(bitmap):
+    """Yield the indices of the set bits, lowest first."""
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+def valid_starts(bitmap, cells):
+    """Return the "HH:MM" start times where `cells` free cells fit."""
+    return [cell_time(index) for index in set_bits(start_mask(bitmap, cells))]
+
+
+def load_bitmaps(first_day, last_day):
+    """
+    Return {date: bitmap} of available TimeSlot cells for a date range,
+    loaded with a single query. Dates without free slots map to 0.
+    """
+    bitmaps = {}
+    slots = (TimeSlot.objects
+             .filter(status='available', date__gte=first_day,
+                     date__lte=last_day)
+             .values_list('date', 'start_time'))
+    for slot_date, start_time in slots:
+        bitmaps[slot_date] = (
+            bitmaps.get(slot_date, 0) | 1 << cell_index(start_time))
+    return bitmaps
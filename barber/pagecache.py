@@ -0,0 +1,113 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+"""
+Whole-page and template fragment caches for the public pages.
+Cached content is keyed on version numbers kept in the cache: one for
+whole pages and one per kind of content (services, reviews, opening
+hours) for template fragments. Saving or deleting a Service, Review or
+OpeningHours bumps the matching versions (see barber.signals), which
+retires every entry built from the old content at once. Logged-in users
+always get a freshly rendered page.
+"""
+
+PAGES = 'public-pages'
+SERVICES = 'services'
+REVIEWS = 'reviews'
+OPENING_HOURS = 'opening-hours'
+
+
+def _version_key(name):
+    return f"{name}:version"
+
+
+def content_version(name):
+    """Return the current version number of a kind of cached content."""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_content_version(*names):
+    """Retire everything cached under the given content versions."""
+    for name in names:
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            cache.set(_version_key(name), 1, None)
+
+
+def public_pages_version():
+    """Return the current version number of the public page cache."""
+    return content_version(PAGES)
+
+
+def invalidate_public_pages():
+    """Retire every cached public page."""
+    bump_content_version(PAGES)
+
+
+class ContentVersions:
+    """
+    Lazy mapping of content versions for templates, used as fragment
+    cache keys: {% cache 3600 services content_versions.services %}.
+    Each version is only read from the cache when a template asks for it.
+    """
+
+    names = {
+        'services': SERVICES,
+        'reviews': REVIEWS,
+        'opening_hours': OPENING_HOURS,
+    }
+
+    def __getitem__(self, name):
+        return content_version(self.names[name])
+
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"public-page:{public_pages_version()}:{path}"
+
+
+def cache_anonymous_page(timeout=None):
+    """
+    Decorator caching a view's response for anonymous GET/HEAD requests.
+    Responses that set cookies or queue messages are never stored, and
+    every response varies on Cookie so shared caches keep logged-in pages
+    apart.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            anonymous = (
+                request.method in ('GET', 'HEAD')
+                and not request.user.is_authenticated
+            )
+            if not anonymous:
+                response = view(request, *args, **kwargs)
+                patch_vary_headers(response, ('Cookie',))
+                return response
+
+            key = _page_key(request)
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            messages_added = getattr(
+                getattr(request, '_messages', None), 'added_new', False)
+            if (response.status_code == 200 and not response.cookies
+                    and not messages_added):
+                cache.set(key, response, timeout if timeout is not None
+                          else settings.PUBLIC_PAGE_CACHE_TIMEOUT)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,51 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+"""
+Keyset (cursor) pagination over (created_at, id), newest first.
+Each page is one indexed range query, so its cost does not depend on how
+many rows come before it.
+"""
+
+
+def encode_cursor(obj):
+    """Return an opaque cursor pointing just after `obj`."""
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, pk) from a cursor, or None if it is invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def keyset_page(queryset, cursor=None, page_size=10):
+    """
+    Return (items, next_cursor) for the page after `cursor`, ordered by
+    -created_at, -id. next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by('-created_at', '-pk')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1])
+    return items, next_cursor
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .availability import invalidate_dates
+from .models import Booking, TimeSlot, TimeSlotArchive
+
+"""
+TimeSlot retention.
+Past available slots are marked expired in one UPDATE, and slots older
+than the retention window that no booking references are moved to
+TimeSlotArchive (or deleted) in batches, so the live table only holds
+the booking horizon plus a short tail of history.
+"""
+
+
+def retention_days():
+    """Return how many days of past timeslots stay in the live table."""
+    return getattr(settings, 'TIMESLOT_RETENTION_DAYS', 30)
+
+
+def expire_past_slots(now=None):
+    """
+    Mark every available slot that has already started as expired and
+    return the number of slots updated.
+    """
+    now = timezone.localtime(now or timezone.now())
+    today = now.date()
+    count = (TimeSlot.objects
+             .filter(status='available')
+             .filter(Q(date__lt=today)
+                     | Q(date=today, start_time__lte=now.time()))
+             .update(status='expired'))
+    if count:
+        invalidate_dates({today})
+    return count
+
+
+def prunable_slots(before):
+    """Return the slots dated before `before` that no booking references."""
+    booked = Booking.timeslots.through.objects.filter(
+        timeslot_id=OuterRef('pk'))
+    return TimeSlot.objects.filter(date__lt=before).filter(~Exists(booked))
+
+
+def prune_slots(before, archive=True, batch_size=1000):
+    """
+    Remove unbooked slots dated before `before`, copying them into
+    TimeSlotArchive first unless `archive` is False. Each batch is
+    archived and deleted in one transaction. Returns the number of slots
+    removed.
+    """
+    removed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                prunable_slots(before)
+                .order_by('pk')
+                .select_for_update()
+                .values_list('pk', 'date', 'start_time', 'end_time',
+                             'status')[:batch_size]
+            )
+            if not batch:
+                return removed
+            if archive:
+                TimeSlotArchive.objects.bulk_create(
+                    [
+                        TimeSlotArchive(date=slot_date, start_time=start,
+                                        end_time=end, status=status)
+                        for _, slot_date, start, end, status in batch
+                    ],
+                    batch_size=batch_size,
+                )
+            TimeSlot.objects.filter(
+                pk__in=[row[0] for row in batch]).delete()
+        removed += len(batch)
+
+
+def retention_cutoff(today=None, days=None):
+    """Return the first date whose slots are kept in the live table."""
+    today = today or timezone.localdate()
+    return today - timedelta(days=retention_days() if days is None else days)
@@ -0,0 +1,48 @@
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Review
+
+"""
+Random review sampling for the About page.
+The list of review IDs is cached, a few IDs are drawn from it in Python
+and only those reviews are fetched, instead of sorting the whole review
+table randomly on every page view.
+"""
+
+REVIEW_IDS_CACHE_KEY = 'reviews:ids'
+
+
+def review_ids():
+    """Return the cached list of all review IDs."""
+    ids = cache.get(REVIEW_IDS_CACHE_KEY)
+    if ids is None:
+        ids = list(Review.objects.values_list('pk', flat=True))
+        cache.set(
+            REVIEW_IDS_CACHE_KEY, ids,
+            getattr(settings, 'REVIEW_IDS_CACHE_TIMEOUT', 600),
+        )
+    return ids
+
+
+def random_reviews(count=3):
+    """
+    Return up to `count` random reviews with their booking, service and
+    user loaded in the same query.
+    """
+    ids = review_ids()
+    chosen = random.sample(ids, min(count, len(ids)))
+    if not chosen:
+        return []
+    reviews = (Review.objects
+               .filter(pk__in=chosen)
+               .select_related('booking__service', 'user')
+               .in_bulk())
+    return [reviews[pk] for pk in chosen if pk in reviews]
+
+
+def invalidate_review_ids():
+    """Drop the cached review IDs after a review is added or removed."""
+    cache.delete(REVIEW_IDS_CACHE_KEY)
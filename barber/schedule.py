@@ -0,0 +1,251 @@
+import bisect
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import (
+    SCHEDULE_CACHE_PREFIX,
+    cache_key,
+    cache_timeout,
+    daterange,
+    invalidate_dates,
+)
+from .models import Booking, OpeningHours
+from .slots import (
+    SLOT_MINUTES,
+    SlotUnavailable,
+    release_held_slots,
+    required_slot_count,
+)
+
+"""
+Interval-based availability engine.
+Free time on a day is the shop's opening hours minus the intervals held
+by non-cancelled bookings, so no TimeSlot rows are needed. Work scales
+with the number of bookings rather than with the minutes the shop is
+open. Enabled with BOOKING_AVAILABILITY_ENGINE = 'intervals'. Bookings
+made here hold no TimeSlots; after switching back, the TimeSlot engine
+checks their starts_at/ends_at so their times cannot be booked again.
+"""
+
+
+def is_enabled():
+    """Return True if bookings should use the interval engine."""
+    return getattr(
+        settings, 'BOOKING_AVAILABILITY_ENGINE', 'timeslots') == 'intervals'
+
+
+def _minutes(value):
+    """Return a time of day as minutes since midnight."""
+    return value.hour * 60 + value.minute
+
+
+def _time(minutes):
+    """Return minutes since midnight as a time of day."""
+    return time(minutes // 60, minutes % 60)
+
+
+class IntervalSet:
+    """
+    Sorted, non-overlapping half-open [start, end) intervals, in minutes
+    since midnight. Lookups and subtraction use binary search.
+    """
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            elif start < end:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def subtract(self, start, end):
+        """Remove [start, end) from the set."""
+        first = bisect.bisect_right(self.ends, start)
+        last = bisect.bisect_left(self.starts, end)
+        if first >= last:
+            return
+        starts, ends = [], []
+        if self.starts[first] < start:
+            starts.append(self.starts[first])
+            ends.append(start)
+        if self.ends[last - 1] > end:
+            starts.append(end)
+            ends.append(self.ends[last - 1])
+        self.starts[first:last] = starts
+        self.ends[first:last] = ends
+
+    def contains(self, start, end):
+        """Return True if [start, end) lies inside one free interval."""
+        index = bisect.bisect_right(self.starts, start) - 1
+        return index >= 0 and self.ends[index] >= end
+
+    def starts_for(self, length, step=SLOT_MINUTES):
+        """Yield every start on the step grid where `length` minutes fit."""
+        for start, end in self:
+            current = -(-start // step) * step
+            while current + length <= end:
+                yield current
+                current += step
+
+
+def _load_free_intervals(days, exclude_booking=None):
+    """
+    Compute the free intervals for each date with two queries: one for
+    the opening hours and one for the overlapping bookings.
+    """
+    hours = {oh.day_of_week: oh for oh in OpeningHours.objects.all()}
+    free = {}
+    for day in days:
+        oh = hours.get(day.weekday())
+        if oh is None:
+            free[day] = IntervalSet()
+        else:
+            free[day] = IntervalSet(
+                [(_minutes(oh.open_time), _minutes(oh.close_time))])
+    if not days:
+        return free
+
+    window_start = timezone.make_aware(datetime.combine(min(days), time()))
+    window_end = timezone.make_aware(
+        datetime.combine(max(days) + timedelta(days=1), time()))
+    busy = (Booking.objects
+            .exclude(status='cancelled')
+            .filter(starts_at__lt=window_end, ends_at__gt=window_start))
+    if exclude_booking is not None and exclude_booking.pk:
+        busy = busy.exclude(pk=exclude_booking.pk)
+    for starts_at, ends_at in busy.values_list('starts_at', 'ends_at'):
+        starts_at = timezone.localtime(starts_at)
+        ends_at = timezone.localtime(ends_at)
+        if starts_at.date() in free:
+            free[starts_at.date()].subtract(
+                _minutes(starts_at), _minutes(ends_at) or 24 * 60)
+    return free
+
+
+def free_intervals(days, exclude_booking=None):
+    """
+    Return a dict mapping each date to its IntervalSet of free time.
+    Days are cached individually and invalidated together with the
+    availability cache; edits that exclude a booking bypass the cache.
+    """
+    days = list(days)
+    if exclude_booking is not None:
+        return _load_free_intervals(days, exclude_booking)
+
+    keys = {cache_key(day, SCHEDULE_CACHE_PREFIX): day for day in days}
+    cached = cache.get_many(keys.keys())
+    result = {
+        keys[key]: IntervalSet(json.loads(value))
+        for key, value in cached.items()
+    }
+    missing = [day for day in days if day not in result]
+    if missing:
+        fresh = _load_free_intervals(missing)
+        cache.set_many(
+            {
+                cache_key(day, SCHEDULE_CACHE_PREFIX): json.dumps(list(free))
+                for day, free in fresh.items()
+            },
+            cache_timeout(),
+        )
+        result.update(fresh)
+    return result
+
+
+def valid_start_times(service_slots, first_day, last_day, today=None,
+                      now=None):
+    """
+    Return a dict mapping every date in the range to the start times
+    ("HH:MM") at which a service of `service_slots` 15-minute slots fits
+    into free time. Mirrors availability.valid_start_times.
+    """
+    today = today or date.today()
+    now = _minutes(now or datetime.now().time())
+    first_day = max(first_day, today)
+    if first_day > last_day:
+        return {}
+    length = service_slots * SLOT_MINUTES
+    result = {}
+    for day, free in sorted(
+            free_intervals(daterange(first_day, last_day)).items()):
+        result[day.isoformat()] = [
+            _time(start).strftime("%H:%M")
+            for start in free.starts_for(length)
+            if day != today or start > now
+        ]
+    return result
+
+
+def is_free(selected_date, start_time, service, booking=None,
+            use_cache=True):
+    """
+    Return True if the service fits into free time at the given start.
+    Like valid_start_times, only starts on the slot grid that have not
+    yet passed are accepted.
+    """
+    start = _minutes(start_time)
+    if start % SLOT_MINUTES or start_time.second or start_time.microsecond:
+        return False
+    today = date.today()
+    if selected_date < today or (
+            selected_date == today
+            and start <= _minutes(datetime.now().time())):
+        return False
+    end = start + required_slot_count(service) * SLOT_MINUTES
+    if use_cache and booking is None:
+        free = free_intervals([selected_date])[selected_date]
+    else:
+        free = _load_free_intervals([selected_date], booking)[selected_date]
+    return free.contains(start, end)
+
+
+def reserve_booking(user, service, selected_date, start_time, booking=None):
+    """
+    Create a pending booking at the given start, or move an existing one
+    there, without TimeSlot rows. The weekday's OpeningHours row is locked
+    so concurrent reservations for that day are serialized, and free time
+    is re-checked inside the lock; SlotUnavailable is raised on conflict.
+    SQLite has no row locks and ignores select_for_update(), so there the
+    lock is a no-op and only PostgreSQL serializes reservations.
+    """
+    start_dt = datetime.combine(selected_date, start_time)
+    end_dt = start_dt + timedelta(
+        minutes=required_slot_count(service) * SLOT_MINUTES)
+    touched_dates = {selected_date}
+    with transaction.atomic():
+        list(OpeningHours.objects.select_for_update().filter(
+            day_of_week=selected_date.weekday()))
+        if booking is not None:
+            booking = Booking.objects.select_for_update().get(pk=booking.pk)
+        if not is_free(selected_date, start_time, service, booking,
+                       use_cache=False):
+            raise SlotUnavailable("The requested time is no longer free.")
+
+        if booking is not None:
+            if booking.starts_at:
+                touched_dates.add(timezone.localtime(booking.starts_at).date())
+            # Release slots held from the TimeSlot engine, if any.
+            release_held_slots(booking, touched_dates)
+            booking.timeslots.clear()
+        else:
+            booking = Booking(user=user)
+        booking.service = service
+        booking.status = 'pending'
+        booking.starts_at = timezone.make_aware(start_dt)
+        booking.ends_at = timezone.make_aware(end_dt)
+        booking.save()
+        transaction.on_commit(lambda: invalidate_dates(touched_dates))
+    return booking
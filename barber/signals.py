@@ -0,0 +1,138 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .models import (
+    Booking,
+    OpeningHours,
+    Review,
+    Service,
+    ServiceRating,
+    TimeSlot,
+)
+from .pagecache import (
+    OPENING_HOURS,
+    PAGES,
+    REVIEWS,
+    SERVICES,
+    bump_content_version,
+)
+from .sampling import invalidate_review_ids
+
+"""
+Signal handlers keeping Booking.starts_at/ends_at in sync with the
+booking's timeslots whenever slots are assigned, removed, cleared or
+edited, keeping the cached review IDs and the per-service rating
+summaries current, and retiring cached public pages and template
+fragments when their content changes.
+"""
+
+
+@receiver(m2m_changed, sender=Booking.timeslots.through)
+def refresh_booking_time_bounds(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Recompute the time bounds of every booking whose slots changed."""
+    if reverse and action == 'pre_clear':
+        # pk_set is empty on clear, so remember the affected bookings.
+        instance._cleared_booking_ids = list(
+            instance.bookings.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        booking_ids = [instance.pk]
+    elif action == 'post_clear':
+        booking_ids = getattr(instance, '_cleared_booking_ids', [])
+    else:
+        booking_ids = list(pk_set or [])
+    if booking_ids:
+        Booking.objects.filter(pk__in=booking_ids).refresh_time_bounds()
+
+
+@receiver(post_save, sender=TimeSlot)
+def refresh_slot_booking_time_bounds(sender, instance, created, **kwargs):
+    """Recompute the bookings of a slot whose date or times were edited."""
+    if not created:
+        Booking.objects.filter(timeslots=instance).refresh_time_bounds()
+
+
+def _review_key(review):
+    """Return (service id, rating) for a review."""
+    service_id = (
+        Booking.objects.filter(pk=review.booking_id)
+        .values_list('service_id', flat=True)
+        .first()
+    )
+    return service_id, int(review.rating)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    """Record the stored service and rating before a review is edited."""
+    instance._previous_rating_key = None
+    if instance.pk:
+        previous = Review.objects.filter(pk=instance.pk).first()
+        if previous is not None:
+            instance._previous_rating_key = _review_key(previous)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """
+    A new review joins the pool sampled by the About page, and the
+    rating summary moves the review to its new service and rating.
+    """
+    if created:
+        invalidate_review_ids()
+    previous = getattr(instance, '_previous_rating_key', None)
+    current = _review_key(instance)
+    if previous == current:
+        return
+    if previous and previous[0]:
+        ServiceRating.apply(previous[0], previous[1], -1)
+    if current[0]:
+        ServiceRating.apply(current[0], current[1], 1)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """
+    A deleted review leaves the pool sampled by the About page and the
+    rating summary of its service.
+    """
+    invalidate_review_ids()
+    service_id, rating = _review_key(instance)
+    if service_id:
+        ServiceRating.apply(service_id, rating, -1)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_changed(sender, **kwargs):
+    """
+    Retire cached public pages, service lists and review lists, which
+    show the name of each review's service.
+    """
+    bump_content_version(PAGES, REVIEWS, SERVICES)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, **kwargs):
+    """
+    Retire cached public pages, review lists and service lists, which
+    show the rating summaries.
+    """
+    bump_content_version(PAGES, REVIEWS, SERVICES)
+
+
+@receiver(post_save, sender=OpeningHours)
+@receiver(post_delete, sender=OpeningHours)
+def opening_hours_changed(sender, **kwargs):
+    """Retire cached public pages and opening hours fragments."""
+    bump_content_version(PAGES, OPENING_HOURS)
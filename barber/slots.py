@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+
+from django.db import transaction
+
+from .availability import invalidate_dates, slotless_bookings
+from .models import Booking, TimeSlot
+
+"""
+Slot search and reservation helpers shared by the booking views and the
+Booking model. Candidate slots for a booking are fetched with a single
+range query and checked for contiguity and availability in memory, then
+claimed atomically with a conditional bulk UPDATE.
+"""
+
+SLOT_MINUTES = 15
+
+# Booking statuses that still hold their slots, and the slot status each
+# one implies. Cancelled and completed bookings hold nothing to move.
+HELD_SLOT_STATUSES = {
+    'pending': 'pending',
+    'confirmed': 'booked',
+}
+
+
+class SlotUnavailable(Exception):
+    """Raised when a slot was claimed by someone else before we could."""
+
+
+def required_slot_count(service):
+    """Return the number of 15-minute slots a service occupies."""
+    return int(service.duration.total_seconds() // (SLOT_MINUTES * 60))
+
+
+def slots_are_contiguous(slots):
+    """
+    Return True if each slot starts exactly when the previous one ends.
+    Slots are expected to be ordered by date and start time.
+    """
+    for i in range(1, len(slots)):
+        prev_end = datetime.combine(slots[i - 1].date, slots[i - 1].end_time)
+        current_start = datetime.combine(slots[i].date, slots[i].start_time)
+        if current_start != prev_end:
+            return False
+    return True
+
+
+def find_contiguous_slots(selected_date, start_time, service, booking=None):
+    """
+    Return the list of contiguous slots needed to book the service at the
+    given date and start time, or None if they cannot be booked.
+
+    All candidate slots are loaded with one query. A slot is usable when
+    it is available, or when the given booking still holds it so that an
+    existing booking can be moved onto overlapping slots. A cancelled
+    booking keeps its links, but its slots may belong to someone else.
+    """
+    required_slots = required_slot_count(service)
+    if required_slots < 1:
+        return None
+
+    start_dt = datetime.combine(selected_date, start_time)
+    end_dt = start_dt + timedelta(minutes=SLOT_MINUTES * required_slots)
+    if end_dt.date() != selected_date:
+        return None
+
+    candidates = list(
+        TimeSlot.objects.filter(
+            date=selected_date,
+            start_time__gte=start_dt.time(),
+            start_time__lt=end_dt.time(),
+        ).order_by('start_time')
+    )
+    if len(candidates) != required_slots:
+        return None
+    if candidates[0].start_time != start_dt.time():
+        return None
+    if candidates[-1].end_time != end_dt.time():
+        return None
+    if not slots_are_contiguous(candidates):
+        return None
+
+    own_slot_ids = set()
+    if (booking is not None and booking.pk
+            and booking.status in HELD_SLOT_STATUSES):
+        own_slot_ids = set(booking.timeslots.filter(
+            status=HELD_SLOT_STATUSES[booking.status],
+        ).values_list('pk', flat=True))
+    for slot in candidates:
+        if slot.status != 'available' and slot.pk not in own_slot_ids:
+            return None
+    return candidates
+
+
+def claim_slots(slots, status='pending'):
+    """
+    Move the given slots from available to the given status with one
+    conditional UPDATE. Raise SlotUnavailable if any slot was no longer
+    available. Must run inside a transaction so a partial claim rolls back.
+    """
+    slot_ids = [slot.pk for slot in slots]
+    claimed = TimeSlot.objects.filter(
+        pk__in=slot_ids, status='available'
+    ).update(status=status)
+    if claimed != len(slot_ids):
+        raise SlotUnavailable(
+            f"Only {claimed} of {len(slot_ids)} slots could be claimed."
+        )
+    for slot in slots:
+        slot.status = status
+
+
+def release_held_slots(booking, touched_dates):
+    """
+    Make the slots a pending or confirmed booking holds available again
+    and add their dates to `touched_dates`. Slots merely linked to a
+    cancelled or completed booking are left alone.
+    """
+    slot_status = HELD_SLOT_STATUSES.get(booking.status)
+    if slot_status is None:
+        return
+    held = TimeSlot.objects.filter(bookings=booking, status=slot_status)
+    touched_dates.update(held.values_list('date', flat=True))
+    held.update(status='available')
+
+
+def reserve_booking(user, service, slots, booking=None):
+    """
+    Create a pending booking for the given slots, or move an existing
+    booking onto them, inside a single transaction.
+
+    The slots are claimed with a conditional UPDATE so two concurrent
+    requests for the same time cannot both succeed: the loser sees fewer
+    affected rows, raises SlotUnavailable and the transaction rolls back.
+    When editing, the booking row is locked and the slots it still holds
+    are released first so the booking can move onto overlapping slots;
+    a cancelled booking's old links are dropped without touching slots
+    that may have been booked since. Bookings made by the interval
+    engine hold no slots, so their times are re-checked.
+    """
+    touched_dates = {slot.date for slot in slots}
+    with transaction.atomic():
+        start_dt = datetime.combine(slots[0].date, slots[0].start_time)
+        end_dt = datetime.combine(slots[-1].date, slots[-1].end_time)
+        if slotless_bookings(start_dt, end_dt, booking):
+            raise SlotUnavailable("The requested time is already booked.")
+        if booking is not None:
+            booking = Booking.objects.select_for_update().get(pk=booking.pk)
+            release_held_slots(booking, touched_dates)
+            claim_slots(slots)
+            booking.timeslots.clear()
+            booking.service = service
+            booking.status = 'pending'
+            booking.save()
+        else:
+            claim_slots(slots)
+            booking = Booking(user=user, service=service, status='pending')
+            booking.save()
+        booking.timeslots.set(slots)
+        transaction.on_commit(lambda: invalidate_dates(touched_dates))
+    return booking
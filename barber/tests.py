@@ -1,3 +1,1114 @@
-from django.test import TestCase
+import json
+import os
+import threading
+from importlib import import_module
+from io import StringIO
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import schedule
+from .loadtest import percentile
+from .management.commands.loadtest import Command as LoadTestCommand
+from .models import (
+    Booking,
+    OpeningHours,
+    Review,
+    Service,
+    ServiceRating,
+    TimeSlot,
+    TimeSlotArchive,
+)
+from .occupancy import bitmap_from_intervals, valid_starts
+from .sampling import random_reviews, review_ids
+from .schedule import IntervalSet
+from .slots import (
+    SlotUnavailable,
+    find_contiguous_slots,
+    reserve_booking,
+)
+
+
+# Pages are rendered without running collectstatic first.
+plain_static_files = override_settings(
+    STATICFILES_STORAGE=(
+        'django.contrib.staticfiles.storage.StaticFilesStorage'),
+)
+
+
+def make_slots(slot_date, start=time(9, 0), count=8):
+    """Create `count` contiguous available 15-minute slots on a date."""
+    slots = []
+    current = start
+    for _ in range(count):
+        end = (datetime.combine(slot_date, current)
+               + timedelta(minutes=15)).time()
+        slots.append(TimeSlot.objects.create(
+            date=slot_date, start_time=current, end_time=end))
+        current = end
+    return slots
+
+
+class SlotSearchTests(TestCase):
+    """Tests for the single-query contiguous slot finder."""
+
+    def setUp(self):
+        self.day = date.today() + timedelta(days=1)
+        self.slots = make_slots(self.day)
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=45), price=20)
+
+    def test_finds_contiguous_slots_in_one_query(self):
+        with self.assertNumQueries(1):
+            found = find_contiguous_slots(self.day, time(9, 15), self.service)
+        self.assertEqual(found, self.slots[1:4])
+
+    def test_rejects_unavailable_slot(self):
+        self.slots[2].status = 'pending'
+        self.slots[2].save()
+        self.assertIsNone(
+            find_contiguous_slots(self.day, time(9, 0), self.service))
+
+    def test_rejects_run_past_closing(self):
+        self.assertIsNone(
+            find_contiguous_slots(self.day, time(10, 45), self.service))
+
+    def test_cancelled_booking_does_not_own_reused_slots(self):
+        user = User.objects.create_user("alice", password="pw")
+        cancelled = reserve_booking(user, self.service, self.slots[:3])
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        reserve_booking(user, self.service, self.slots[:3])
+        self.assertIsNone(find_contiguous_slots(
+            self.day, time(9, 0), self.service, booking=cancelled))
+
+
+class ReservationTests(TestCase):
+    """Tests for the transactional slot reservation engine."""
+
+    def setUp(self):
+        self.day = date.today() + timedelta(days=1)
+        self.slots = make_slots(self.day)
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=45), price=20)
+        self.user = User.objects.create_user("alice", password="pw")
+
+    def test_reserve_marks_slots_pending(self):
+        booking = reserve_booking(self.user, self.service, self.slots[:3])
+        self.assertEqual(booking.status, 'pending')
+        self.assertEqual(booking.timeslots.count(), 3)
+        self.assertEqual(
+            TimeSlot.objects.filter(status='pending').count(), 3)
+
+    def test_conflict_rolls_back(self):
+        reserve_booking(self.user, self.service, self.slots[:3])
+        with self.assertRaises(SlotUnavailable):
+            reserve_booking(self.user, self.service, self.slots[2:5])
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(
+            TimeSlot.objects.filter(status='pending').count(), 3)
+
+    def test_edit_moves_onto_overlapping_slots(self):
+        booking = reserve_booking(self.user, self.service, self.slots[:3])
+        new_slots = find_contiguous_slots(
+            self.day, time(9, 15), self.service, booking=booking)
+        reserve_booking(self.user, self.service, new_slots, booking=booking)
+        self.assertEqual(
+            list(booking.timeslots.order_by('start_time')), self.slots[1:4])
+        self.assertEqual(
+            TimeSlot.objects.get(pk=self.slots[0].pk).status, 'available')
+
+    def test_editing_cancelled_booking_keeps_reused_slots(self):
+        cancelled = reserve_booking(self.user, self.service, self.slots[:3])
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        other = User.objects.create_user("bob", password="pw")
+        taken = reserve_booking(other, self.service, self.slots[:3])
+        with self.assertRaises(SlotUnavailable):
+            reserve_booking(
+                self.user, self.service, self.slots[:3], booking=cancelled)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+        for slot in self.slots[:3]:
+            slot.refresh_from_db()
+            self.assertEqual(slot.status, 'pending')
+            self.assertEqual(
+                list(slot.bookings.exclude(status='cancelled')
+                     .values_list('pk', flat=True)),
+                [taken.pk])
+
+    def test_book_now_refuses_to_edit_cancelled_booking(self):
+        cancelled = reserve_booking(self.user, self.service, self.slots[:3])
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("book_now") + f"?edit={cancelled.pk}",
+            {"service": self.service.pk, "date": self.day.isoformat(),
+             "time": "09:00"})
+        self.assertRedirects(
+            response, reverse("profile"), fetch_redirect_response=False)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    """
+    Stress test: many threads race for the same slots and at most one of
+    them may win. Runs against whichever database is configured.
+    """
+
+    THREADS = 8
+
+    def test_no_double_booking_under_contention(self):
+        day = date.today() + timedelta(days=1)
+        slots = make_slots(day, count=3)
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=45), price=20)
+        users = [
+            User.objects.create_user(f"user{i}", password="pw")
+            for i in range(self.THREADS)
+        ]
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+
+        def attempt(user):
+            try:
+                barrier.wait()
+                reserve_booking(user, service, slots)
+                results.append('booked')
+            except (SlotUnavailable, DatabaseError):
+                results.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=attempt, args=(user,)) for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), self.THREADS)
+        self.assertEqual(results.count('booked'), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+        for slot in TimeSlot.objects.all():
+            self.assertEqual(slot.bookings.count(), 1)
+            self.assertEqual(slot.status, 'pending')
+
+
+class AvailabilityTests(TestCase):
+    """Tests for the cached availability API behind the booking page."""
+
+    def setUp(self):
+        cache.clear()
+        self.day = date.today() + timedelta(days=1)
+        self.slots = make_slots(self.day, count=4)
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        self.user = User.objects.create_user("alice", password="pw")
+        self.client.force_login(self.user)
+
+    def get_availability(self, **headers):
+        return self.client.get(
+            reverse("availability"),
+            {"service": self.service.pk, "start": self.day.isoformat(),
+             "days": 2},
+            **headers,
+        )
+
+    def test_returns_valid_start_times_for_service(self):
+        data = self.get_availability().json()
+        self.assertEqual(data["dates"], {
+            self.day.isoformat(): ["09:00", "09:15", "09:30"],
+            (self.day + timedelta(days=1)).isoformat(): [],
+        })
+        self.assertEqual(
+            data["next"], (self.day + timedelta(days=2)).isoformat())
+
+    def test_warm_cache_skips_slot_query(self):
+        self.get_availability()
+        # Session, user and service lookups only.
+        with self.assertNumQueries(3):
+            self.get_availability()
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.get_availability()["ETag"]
+        response = self.get_availability(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_reservation_invalidates_touched_date(self):
+        etag = self.get_availability()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_booking(self.user, self.service, self.slots[:2])
+        response = self.get_availability(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["dates"][self.day.isoformat()], ["09:30"])
+
+    def test_start_near_date_max_is_rejected(self):
+        response = self.client.get(reverse("availability"), {
+            "service": self.service.pk,
+            "start": date.max.isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid start date."})
+
+
+class BookingTimeBoundsTests(TestCase):
+    """Tests keeping Booking.starts_at/ends_at in sync with its slots."""
+
+    def setUp(self):
+        self.day = date.today() + timedelta(days=1)
+        self.slots = make_slots(self.day, count=4)
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        user = User.objects.create_user("alice", password="pw")
+        self.booking = Booking.objects.create(user=user, service=service)
+
+    def at(self, hour, minute=0, day=None):
+        return timezone.make_aware(
+            datetime.combine(day or self.day, time(hour, minute)))
+
+    def assertBounds(self, starts_at, ends_at):
+        self.booking.refresh_from_db()
+        self.assertEqual(
+            (self.booking.starts_at, self.booking.ends_at),
+            (starts_at, ends_at))
+
+    def test_forward_add_remove_and_clear(self):
+        self.booking.timeslots.add(*self.slots[:3])
+        self.assertBounds(self.at(9), self.at(9, 45))
+        self.booking.timeslots.remove(self.slots[0])
+        self.assertBounds(self.at(9, 15), self.at(9, 45))
+        self.booking.timeslots.clear()
+        self.assertBounds(None, None)
+
+    def test_reverse_add_remove_and_clear(self):
+        for slot in self.slots[:3]:
+            slot.bookings.add(self.booking)
+        self.assertBounds(self.at(9), self.at(9, 45))
+        self.slots[2].bookings.remove(self.booking)
+        self.assertBounds(self.at(9), self.at(9, 30))
+        self.slots[0].bookings.clear()
+        self.assertBounds(self.at(9, 15), self.at(9, 30))
+
+    def test_editing_a_slot_moves_the_booking(self):
+        self.booking.timeslots.set(self.slots[:2])
+        later = self.day + timedelta(days=1)
+        for slot in self.slots[:2]:
+            slot.date = later
+            slot.save()
+        self.assertBounds(self.at(9, day=later), self.at(9, 30, day=later))
+        self.slots[1].end_time = time(9, 40)
+        self.slots[1].save()
+        self.assertBounds(self.at(9, day=later), self.at(9, 40, day=later))
+
+    def test_migration_backfills_missing_bounds(self):
+        self.booking.timeslots.set(self.slots[1:3])
+        Booking.objects.update(starts_at=None, ends_at=None)
+        backfill = import_module(
+            'barber.migrations.0010_backfill_booking_time_bounds')
+        backfill.backfill_time_bounds(django_apps, None)
+        self.assertBounds(self.at(9, 15), self.at(9, 45))
+
+
+class MarkCompletedTests(TestCase):
+    """Tests for the set-based completion sweep."""
+
+    def setUp(self):
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        self.user = User.objects.create_user("alice", password="pw")
+
+    def make_booking(self, slot_date, status):
+        slots = make_slots(slot_date, count=2)
+        booking = Booking.objects.create(
+            user=self.user, service=self.service, status='pending')
+        booking.timeslots.set(slots)
+        Booking.objects.filter(pk=booking.pk).update(status=status)
+        return booking
+
+    def test_only_finished_confirmed_bookings_complete(self):
+        today = date.today()
+        past = self.make_booking(today - timedelta(days=2), 'confirmed')
+        future = self.make_booking(today + timedelta(days=2), 'confirmed')
+        pending = self.make_booking(today - timedelta(days=3), 'pending')
+
+        with self.assertNumQueries(2):
+            call_command('mark_completed', stdout=StringIO())
+
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[past.pk], 'completed')
+        self.assertEqual(statuses[future.pk], 'confirmed')
+        self.assertEqual(statuses[pending.pk], 'pending')
+
+
+@plain_static_files
+class ProfileTests(TestCase):
+    """Tests for the read-only profile page."""
+
+    def test_finished_booking_shows_completed_without_writing(self):
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        user = User.objects.create_user("alice", password="pw")
+        booking = Booking.objects.create(user=user, service=service)
+        booking.timeslots.set(
+            make_slots(date.today() - timedelta(days=1), count=2))
+        Booking.objects.filter(pk=booking.pk).update(status='confirmed')
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('profile'))
+
+        self.assertEqual(response.context['past_bookings'], [booking])
+        self.assertContains(response, "Status: completed")
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        user = User.objects.create_user("bob", password="pw")
+        self.client.force_login(user)
+
+        def add_bookings(offsets):
+            for offset in offsets:
+                slot_date = date.today() + timedelta(days=offset)
+                booking = Booking.objects.create(user=user, service=service)
+                booking.timeslots.set(make_slots(slot_date, count=2))
+                if offset < 0:
+                    Booking.objects.filter(pk=booking.pk).update(
+                        status='completed')
+                    Review.objects.create(booking=booking, user=user)
+
+        add_bookings([-1, 1])
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('profile'))
+        add_bookings([-5, -4, -3, -2, 2, 3, 4, 5])
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse('profile'))
+        self.assertEqual(len(many), len(few))
+
+
+class IntervalSetTests(TestCase):
+    """Tests for the sorted-interval structure of the schedule engine."""
+
+    def test_subtract_splits_and_trims(self):
+        free = IntervalSet([(540, 1020)])
+        free.subtract(600, 645)
+        free.subtract(1000, 1100)
+        self.assertEqual(list(free), [(540, 600), (645, 1000)])
+
+    def test_starts_for_respects_length(self):
+        free = IntervalSet([(540, 600), (645, 720)])
+        self.assertEqual(list(free.starts_for(45)), [540, 555, 645, 660, 675])
+        self.assertTrue(free.contains(645, 720))
+        self.assertFalse(free.contains(585, 630))
+
+
+@override_settings(BOOKING_AVAILABILITY_ENGINE='intervals')
+class IntervalEngineTests(TestCase):
+    """Tests for booking through the interval engine without TimeSlots."""
+
+    def setUp(self):
+        cache.clear()
+        self.day = date.today() + timedelta(days=1)
+        OpeningHours.objects.create(
+            day_of_week=self.day.weekday(),
+            open_time=time(9, 0), close_time=time(10, 30))
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=45), price=20)
+        self.user = User.objects.create_user("alice", password="pw")
+        self.client.force_login(self.user)
+
+    def test_booking_removes_interval_from_availability(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("book_now"), {
+                "service": self.service.pk,
+                "date": self.day.isoformat(),
+                "time": "09:15",
+            })
+        self.assertRedirects(
+            response, reverse("profile"), fetch_redirect_response=False)
+        booking = Booking.objects.get()
+        self.assertEqual(booking.get_time_range(), "09:15 - 10:00")
+        self.assertFalse(TimeSlot.objects.exists())
+
+        data = self.client.get(reverse("availability"), {
+            "service": self.service.pk,
+            "start": self.day.isoformat(),
+            "days": 1,
+        }).json()
+        self.assertEqual(data["dates"], {self.day.isoformat(): []})
+
+    def test_overlapping_reservation_is_rejected(self):
+        # Sequential: this checks the free-time re-check, not the
+        # OpeningHours lock, which SQLite ignores.
+        schedule.reserve_booking(self.user, self.service, self.day, time(9))
+        with self.assertRaises(SlotUnavailable):
+            schedule.reserve_booking(
+                self.user, self.service, self.day, time(9, 30))
+
+    def test_off_grid_and_past_starts_are_rejected(self):
+        self.assertTrue(schedule.is_free(self.day, time(9), self.service))
+        self.assertFalse(
+            schedule.is_free(self.day, time(9, 7), self.service))
+        response = self.client.post(reverse("book_now"), {
+            "service": self.service.pk,
+            "date": self.day.isoformat(),
+            "time": "09:07",
+        })
+        self.assertRedirects(
+            response, reverse("book_now"), fetch_redirect_response=False)
+        self.assertFalse(Booking.objects.exists())
+
+        today = date.today()
+        OpeningHours.objects.create(
+            day_of_week=today.weekday(),
+            open_time=time(0), close_time=time(23, 45))
+        self.assertFalse(schedule.is_free(today, time(0), self.service))
+        with self.assertRaises(SlotUnavailable):
+            schedule.reserve_booking(self.user, self.service, today, time(0))
+
+    def test_switching_back_keeps_interval_bookings(self):
+        schedule.reserve_booking(self.user, self.service, self.day, time(9))
+        slots = make_slots(self.day, count=6)
+        with override_settings(BOOKING_AVAILABILITY_ENGINE='timeslots'):
+            data = self.client.get(reverse("availability"), {
+                "service": self.service.pk,
+                "start": self.day.isoformat(),
+                "days": 1,
+            }).json()
+            self.assertEqual(data["dates"], {self.day.isoformat(): ["09:45"]})
+            with self.assertRaises(SlotUnavailable):
+                reserve_booking(self.user, self.service, slots[1:4])
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class OccupancyBitmapTests(TestCase):
+    """Tests for the sliding-window start computation on day bitmaps."""
+
+    def test_valid_starts_need_a_full_free_run(self):
+        # Free 09:00-10:00 and 10:30-11:00.
+        bitmap = bitmap_from_intervals([(540, 600), (630, 660)])
+        self.assertEqual(
+            valid_starts(bitmap, 3), ["09:00", "09:15"])
+        self.assertEqual(
+            valid_starts(bitmap, 2), ["09:00", "09:15", "09:30", "10:30"])
+        self.assertEqual(valid_starts(bitmap, 5), [])
+
+
+class BookingAdminActionTests(TestCase):
+    """Tests for the set-based confirm and decline admin actions."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("boss", password="pw")
+        self.client.force_login(self.admin)
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        self.bookings = []
+        for offset in range(1, 4):
+            booking = Booking.objects.create(user=self.admin, service=service)
+            booking.timeslots.set(make_slots(
+                date.today() + timedelta(days=offset), count=2))
+            self.bookings.append(booking)
+
+    def run_action(self, action):
+        return self.client.post(reverse("admin:barber_booking_changelist"), {
+            "action": action,
+            "_selected_action": [booking.pk for booking in self.bookings],
+        })
+
+    def test_confirm_updates_bookings_and_slots(self):
+        self.run_action("confirm_bookings")
+        self.assertEqual(
+            Booking.objects.filter(status="confirmed").count(), 3)
+        self.assertEqual(TimeSlot.objects.filter(status="booked").count(), 6)
+
+    def test_decline_frees_slots(self):
+        self.run_action("confirm_bookings")
+        self.run_action("decline_bookings")
+        self.assertEqual(
+            Booking.objects.filter(status="cancelled").count(), 3)
+        self.assertEqual(
+            TimeSlot.objects.filter(status="available").count(), 6)
+
+    def test_lock_query_has_no_group_by_or_join(self):
+        # The changelist annotates bookings over an outer join; SQLite
+        # drops FOR UPDATE, so the locking query's shape is checked.
+        selected = Booking.objects.with_time_bounds().annotate(
+            slot_count=Count("timeslots"))
+        locked = admin.site._registry[Booking].locked_bookings(selected)
+        self.assertTrue(locked.query.select_for_update)
+        sql = str(locked.query).upper()
+        self.assertNotIn("GROUP BY", sql)
+        self.assertNotIn("JOIN", sql)
+        self.assertEqual(len(locked), 3)
+
+
+@plain_static_files
+class BookingAdminChangelistTests(TestCase):
+    """The booking changelist must not issue per-row queries."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("boss", password="pw")
+        self.client.force_login(self.admin)
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        self.next_day = 1
+
+    def add_bookings(self, count):
+        for _ in range(count):
+            user = User.objects.create_user(f"customer{self.next_day}")
+            booking = Booking.objects.create(user=user, service=self.service)
+            booking.timeslots.set(make_slots(
+                date.today() + timedelta(days=self.next_day), count=2))
+            self.next_day += 1
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("admin:barber_booking_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        self.add_bookings(2)
+        few = self.changelist_queries()
+        self.add_bookings(20)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_annotations_stay_out_of_action_querysets(self):
+        self.add_bookings(2)
+        request = RequestFactory().get(
+            reverse("admin:barber_booking_changelist"))
+        request.user = self.admin
+        changelist = admin.site._registry[Booking].get_changelist_instance(
+            request)
+        self.assertEqual(
+            {booking.slot_count for booking in changelist.result_list}, {2})
+        self.assertNotIn("GROUP BY", str(changelist.queryset.query))
+        self.assertNotIn(
+            "GROUP BY", str(changelist.get_queryset(request).query))
+
+
+class ReviewSamplingTests(TestCase):
+    """Tests for the cached random review sampler."""
+
+    def setUp(self):
+        cache.clear()
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        self.user = User.objects.create_user("alice", password="pw")
+        for _ in range(5):
+            booking = Booking.objects.create(user=self.user, service=service)
+            Review.objects.create(booking=booking, user=self.user)
+
+    def test_sample_is_loaded_in_one_query_when_ids_are_cached(self):
+        random_reviews(3)
+        with self.assertNumQueries(1):
+            sample = random_reviews(3)
+            names = [review.booking.service.name for review in sample]
+        self.assertEqual(len(set(review.pk for review in sample)), 3)
+        self.assertEqual(names, ["Cut"] * 3)
+
+    def test_new_review_refreshes_id_pool(self):
+        random_reviews(3)
+        booking = Booking.objects.create(
+            user=self.user, service=Service.objects.get())
+        review = Review.objects.create(booking=booking, user=self.user)
+        self.assertIn(review.pk, review_ids())
+
+
+@plain_static_files
+class ReviewPaginationTests(TestCase):
+    """Tests for the cursor-paginated Reviews page."""
+
+    def setUp(self):
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        user = User.objects.create_user("alice", password="pw")
+        for _ in range(25):
+            booking = Booking.objects.create(user=user, service=service)
+            Review.objects.create(booking=booking, user=user)
+
+    def test_json_pages_cover_every_review_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"format": "json"}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(reverse("reviews"), params).json()
+            seen.extend(review["id"] for review in data["reviews"])
+            cursor = data["next"]
+            if not cursor:
+                break
+        expected = list(
+            Review.objects.order_by("-created_at", "-pk")
+            .values_list("pk", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_page_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("reviews"))
+        self.assertEqual(len(response.context["all_reviews"]), 10)
+        self.assertContains(response, "Older Reviews")
+
+
+class ServiceRatingTests(TestCase):
+    """Tests for the incrementally maintained per-service rating summary."""
+
+    def setUp(self):
+        self.cut = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        self.shave = Service.objects.create(
+            name="Shave", duration=timedelta(minutes=30), price=10)
+        self.user = User.objects.create_user("alice", password="pw")
+
+    def review(self, service, rating):
+        booking = Booking.objects.create(user=self.user, service=service)
+        return Review.objects.create(
+            booking=booking, user=self.user, rating=rating)
+
+    def summary(self, service):
+        return ServiceRating.objects.get(service=service)
+
+    def test_rating_outside_range_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "between 1 and 5"):
+            ServiceRating.apply(self.cut.pk, 6, 1)
+        self.assertFalse(ServiceRating.objects.exists())
+
+    def test_create_edit_and_delete_update_summary(self):
+        first = self.review(self.cut, 5)
+        self.review(self.cut, 3)
+        self.assertEqual(self.summary(self.cut).average, 4.0)
+
+        first.rating = 1
+        first.save()
+        summary = self.summary(self.cut)
+        self.assertEqual(summary.review_count, 2)
+        self.assertEqual(
+            summary.histogram, {1: 1, 2: 0, 3: 1, 4: 0, 5: 0})
+
+        first.delete()
+        summary = self.summary(self.cut)
+        self.assertEqual(summary.review_count, 1)
+        self.assertEqual(summary.average, 3.0)
+
+    def test_moving_review_to_another_booking_moves_rating(self):
+        review = self.review(self.cut, 4)
+        review.booking = Booking.objects.create(
+            user=self.user, service=self.shave)
+        review.save()
+        self.assertEqual(self.summary(self.cut).review_count, 0)
+        self.assertEqual(self.summary(self.shave).average, 4.0)
+
+
+@plain_static_files
+class PublicPageCacheTests(TestCase):
+    """Tests for the public page and template fragment caches."""
+
+    def setUp(self):
+        cache.clear()
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+
+    def test_anonymous_page_is_served_from_cache(self):
+        first = self.client.get(reverse("services"))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("services"))
+        self.assertEqual(first.content, second.content)
+        self.assertIn("Cookie", second["Vary"])
+
+    def test_service_change_retires_cached_page(self):
+        self.client.get(reverse("services"))
+        self.service.name = "Skin Fade"
+        self.service.save()
+        self.assertContains(self.client.get(reverse("services")), "Skin Fade")
+
+    def test_logged_in_users_bypass_cache(self):
+        self.client.get(reverse("services"))
+        User.objects.create_user("alice", password="pw")
+        self.client.login(username="alice", password="pw")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("services"))
+        self.assertTrue(queries.captured_queries)
+
+    def test_service_change_retires_cached_fragment(self):
+        User.objects.create_user("alice", password="pw")
+        self.client.login(username="alice", password="pw")
+        self.assertContains(self.client.get(reverse("services")), "Cut")
+        self.service.name = "Skin Fade"
+        self.service.save()
+        self.assertContains(self.client.get(reverse("services")), "Skin Fade")
+
+    def test_service_change_retires_cached_review_list(self):
+        user = User.objects.create_user("alice", password="pw")
+        booking = Booking.objects.create(user=user, service=self.service)
+        Review.objects.create(booking=booking, user=user, rating=5)
+        self.client.login(username="alice", password="pw")
+        self.assertContains(self.client.get(reverse("reviews")), "Cut")
+        self.service.name = "Skin Fade"
+        self.service.save()
+        self.assertContains(self.client.get(reverse("reviews")), "Skin Fade")
+
+
+class TimeSlotsCommandTests(TestCase):
+    """Tests for the bulk timeslot generator."""
+
+    def setUp(self):
+        # 09:00-10:00 every day gives four slots per day.
+        OpeningHours.objects.bulk_create([
+            OpeningHours(day_of_week=weekday, open_time=time(9),
+                         close_time=time(10))
+            for weekday in range(7)
+        ])
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('timeslots', '--quiet', *args, stdout=out)
+        return out.getvalue()
+
+    def test_second_run_creates_nothing(self):
+        self.assertIn("created: 12", self.run_command('--days', '3'))
+        self.assertIn("created: 0", self.run_command('--days', '3'))
+        self.assertEqual(TimeSlot.objects.count(), 12)
+
+    def test_existing_rows_are_not_duplicated(self):
+        make_slots(date.today(), count=2)
+        self.assertIn("created: 10", self.run_command('--days', '3'))
+        self.assertEqual(
+            TimeSlot.objects.values(
+                'date', 'start_time', 'end_time').distinct().count(),
+            12)
+
+    def test_dry_run_writes_nothing(self):
+        out = self.run_command('--days', '3', '--dry-run')
+        self.assertIn("12 new timeslots would be created", out)
+        self.assertFalse(TimeSlot.objects.exists())
+
+    def test_query_count_does_not_grow_with_days(self):
+        # One query for the opening hours, one for the existing rows and
+        # one INSERT per batch.
+        with self.assertNumQueries(3):
+            self.run_command('--days', '3')
+        with self.assertNumQueries(3):
+            self.run_command('--days', '30')
+        with self.assertNumQueries(2):
+            self.run_command('--days', '60', '--dry-run')
+
+
+class TimeSlotRetentionTests(TestCase):
+    """Tests for expiring and archiving old timeslots."""
+
+    def setUp(self):
+        self.today = date.today()
+        self.old = make_slots(self.today - timedelta(days=40), count=4)
+        self.recent = make_slots(self.today - timedelta(days=2), count=2)
+        self.future = make_slots(self.today + timedelta(days=2), count=2)
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        user = User.objects.create_user("alice", password="pw")
+        self.booking = Booking.objects.create(
+            user=user, service=service, status='pending')
+        self.booking.timeslots.set(self.old[:2])
+
+    def test_retention_expires_and_archives_unbooked_slots(self):
+        call_command('timeslot_retention', '--days', '30', stdout=StringIO())
+
+        live = set(TimeSlot.objects.values_list('pk', flat=True))
+        self.assertEqual(
+            live,
+            {slot.pk for slot in self.old[:2] + self.recent + self.future})
+        self.assertEqual(TimeSlotArchive.objects.count(), 2)
+        self.assertEqual(self.booking.timeslots.count(), 2)
+        self.assertEqual(
+            set(TimeSlot.objects.filter(date__lt=self.today)
+                .exclude(bookings=self.booking)
+                .values_list('status', flat=True)),
+            {'expired'})
+        self.assertTrue(TimeSlot.objects.filter(
+            pk=self.future[0].pk, status='available').exists())
+
+    def test_delete_skips_archive(self):
+        call_command('timeslot_retention', '--days', '30', '--delete',
+                     stdout=StringIO())
+        self.assertEqual(TimeSlotArchive.objects.count(), 0)
+        self.assertEqual(TimeSlot.objects.count(), 6)
+
+
+class IntegrityCommandTests(TestCase):
+    """Tests for the aggregate integrity checker."""
+
+    def setUp(self):
+        self.service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        self.user = User.objects.create_user("alice", password="pw")
+        self.slots = make_slots(date.today() + timedelta(days=1), count=6)
+
+    def book(self, slots, status):
+        booking = Booking.objects.create(
+            user=self.user, service=self.service, status='pending')
+        booking.timeslots.set(slots)
+        Booking.objects.filter(pk=booking.pk).update(status=status)
+        return booking
+
+    def run_checks(self, *args):
+        out = StringIO()
+        call_command('integrity', '--json', *args, stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_clean_data_passes(self):
+        self.book(self.slots[:2], 'pending')
+        TimeSlot.objects.filter(pk__in=[s.pk for s in self.slots[:2]]).update(
+            status='pending')
+        self.assertTrue(self.run_checks()["ok"])
+
+    def test_reports_bookings_without_slots(self):
+        empty = self.book([], 'pending')
+        checks = self.run_checks()["checks"]
+        self.assertEqual(
+            checks["slot_count_mismatches"]["items"],
+            [{"booking": empty.pk, "slots": 0, "expected": 2}])
+        self.assertEqual(checks["non_contiguous_bookings"]["count"], 0)
+
+    def test_interval_engine_bookings_are_skipped(self):
+        starts_at = timezone.make_aware(
+            datetime.combine(date.today() + timedelta(days=1), time(9)))
+        interval = self.book([], 'pending')
+        Booking.objects.filter(pk=interval.pk).update(
+            starts_at=starts_at, ends_at=starts_at + timedelta(minutes=30))
+        empty = self.book([], 'pending')
+        with override_settings(BOOKING_AVAILABILITY_ENGINE='intervals'):
+            checks = self.run_checks()["checks"]
+        self.assertEqual(
+            [item["booking"]
+             for item in checks["slot_count_mismatches"]["items"]],
+            [empty.pk])
+
+    def test_finds_problems_and_fixes_statuses(self):
+        first = self.book(self.slots[:2], 'confirmed')
+        second = self.book(self.slots[1:3], 'pending')
+        gapped = self.book([self.slots[3], self.slots[5]], 'cancelled')
+        TimeSlot.objects.filter(pk=self.slots[4].pk).update(status='booked')
+
+        checks = self.run_checks("--fix")["checks"]
+        self.assertEqual(
+            checks["double_booked_timeslots"]["items"],
+            [{"timeslot": self.slots[1].pk,
+              "bookings": [first.pk, second.pk]}])
+        self.assertEqual(
+            [item["booking"]
+             for item in checks["non_contiguous_bookings"]["items"]],
+            [gapped.pk])
+        self.assertEqual(checks["orphaned_slots"]["count"], 1)
+
+        statuses = dict(TimeSlot.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[self.slots[0].pk], 'booked')
+        self.assertEqual(statuses[self.slots[1].pk], 'available')
+        self.assertEqual(statuses[self.slots[2].pk], 'pending')
+        self.assertEqual(statuses[self.slots[4].pk], 'available')
+
+
+@plain_static_files
+class ViewBudgetTests(TestCase):
+    """
+    Performance regression suite: every URL is requested against a
+    generate_load_data fixture of thousands of slots, bookings and
+    reviews, and must stay within a query-count budget, so an N+1 query
+    in a view or template fails the suite. Wall-time budgets depend on
+    the machine and are only checked when PERF_BUDGET_TIMES=1 is set;
+    PERF_BUDGET_SCALE stretches them on slow machines.
+    """
+
+    # url name -> (max queries, max seconds)
+    BUDGETS = {
+        'home': (1, 0.5),
+        'base': (1, 0.5),
+        'about': (3, 0.5),
+        'services': (3, 0.5),
+        'reviews': (3, 0.5),
+        'reviews_json': (2, 0.5),
+        'book_now': (4, 0.5),
+        'book_now_edit': (5, 0.5),
+        'book_now_post': (19, 1.0),
+        'availability': (5, 0.5),
+        'profile': (5, 0.5),
+        'booking_cancel': (7, 0.5),
+        'create_review': (5, 0.5),
+        'edit_review': (4, 0.5),
+        'delete_review': (9, 0.5),
+        'register': (1, 0.5),
+        'login': (1, 0.5),
+        'logout': (4, 0.5),
+        'password_change': (3, 0.5),
+        'password_change_done': (3, 0.5),
+        'password_reset': (1, 0.5),
+        'password_reset_done': (1, 0.5),
+        'password_reset_confirm': (2, 0.5),
+        'password_reset_complete': (1, 0.5),
+        'admin_index': (4, 0.5),
+        'admin_booking_changelist': (6, 1.0),
+        'admin_timeslot_changelist': (6, 1.0),
+        'admin_review_changelist': (7, 1.0),
+        'admin_service_changelist': (6, 0.5),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_load_data', users=10, days=30, past_days=30,
+                     seed=1, stdout=StringIO())
+        cls.admin = User.objects.create_superuser("boss", password="pw")
+        cls.user = User.objects.filter(
+            bookings__status='confirmed', reviews__isnull=False,
+        ).order_by('pk').first()
+        cls.upcoming = Booking.objects.filter(
+            user=cls.user, status='confirmed').order_by('starts_at').first()
+        cls.review = Review.objects.filter(user=cls.user).first()
+        cls.unreviewed = Booking.objects.filter(
+            user=cls.user, status='completed', review__isnull=True).first()
+
+    def setUp(self):
+        cache.clear()
+        self.check_times = os.environ.get('PERF_BUDGET_TIMES') == '1'
+        self.scale = float(os.environ.get('PERF_BUDGET_SCALE', '1'))
+
+    def assertWithinBudget(self, name, url, method='get', data=None):
+        max_queries, max_seconds = self.BUDGETS[name]
+        with CaptureQueriesContext(connection) as queries:
+            started = perf_counter()
+            response = getattr(self.client, method)(url, data)
+            elapsed = perf_counter() - started
+        self.assertLess(response.status_code, 400, name)
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f"{name} ran {len(queries)} queries (budget {max_queries})")
+        if self.check_times:
+            self.assertLessEqual(
+                elapsed, max_seconds * self.scale,
+                f"{name} took {elapsed:.3f}s (budget {max_seconds}s)")
+        return response
+
+    def test_anonymous_pages(self):
+        for name in ('home', 'base', 'about', 'services', 'reviews',
+                     'register', 'login', 'password_reset',
+                     'password_reset_done', 'password_reset_complete'):
+            with self.subTest(name=name):
+                self.assertWithinBudget(name, reverse(name))
+        self.assertWithinBudget(
+            'reviews_json', reverse('reviews'), data={'format': 'json'})
+        self.assertWithinBudget(
+            'password_reset_confirm',
+            reverse('password_reset_confirm', args=['MQ', 'bad-token']))
+
+    def test_customer_pages(self):
+        self.client.force_login(self.user)
+        for name in ('services', 'reviews', 'book_now', 'profile',
+                     'password_change', 'password_change_done'):
+            with self.subTest(name=name):
+                self.assertWithinBudget(name, reverse(name))
+        self.assertWithinBudget(
+            'book_now_edit', reverse('book_now'),
+            data={'edit': self.upcoming.pk})
+        self.assertWithinBudget(
+            'availability', reverse('availability'),
+            data={'service': self.upcoming.service_id, 'days': 31})
+        self.assertWithinBudget(
+            'create_review',
+            reverse('create_review', args=[self.unreviewed.pk]))
+        self.assertWithinBudget(
+            'edit_review', reverse('edit_review', args=[self.review.pk]))
+
+    def test_customer_actions(self):
+        self.client.force_login(self.user)
+        free = TimeSlot.objects.filter(
+            status='available', date__gt=date.today()).first()
+        shortest = Service.objects.order_by('duration').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertWithinBudget(
+                'book_now_post', reverse('book_now'), method='post',
+                data={'service': shortest.pk,
+                      'date': free.date.isoformat(),
+                      'time': free.start_time.strftime('%H:%M')})
+            self.assertWithinBudget(
+                'booking_cancel',
+                reverse('booking_cancel', args=[self.upcoming.pk]))
+            self.assertWithinBudget(
+                'delete_review', reverse('delete_review',
+                                         args=[self.review.pk]),
+                method='post')
+        self.assertWithinBudget('logout', reverse('logout'), method='post')
+
+    def test_admin_pages(self):
+        self.client.force_login(self.admin)
+        self.assertWithinBudget('admin_index', reverse('admin:index'))
+        for model in ('booking', 'timeslot', 'review', 'service'):
+            name = f'admin_{model}_changelist'
+            with self.subTest(name=name):
+                self.assertWithinBudget(
+                    name, reverse(f'admin:barber_{model}_changelist'))
+
+
+class GenerateLoadDataTests(TestCase):
+    """Tests for the synthetic dataset generator."""
+
+    def generate(self, *args):
+        call_command('generate_load_data', '--users', '3', '--days', '3',
+                     '--past-days', '3', *args, stdout=StringIO())
+        return list(Booking.objects.order_by('starts_at').values_list(
+            'user__username', 'service__name', 'status', 'starts_at'))
+
+    def test_same_seed_gives_same_data(self):
+        first = self.generate('--seed', '5')
+        self.assertTrue(first)
+        self.assertEqual(self.generate('--seed', '5', '--flush'), first)
+        self.assertNotEqual(self.generate('--seed', '6', '--flush'), first)
+
+    def test_generated_data_passes_integrity_checks(self):
+        self.generate()
+        out = StringIO()
+        call_command('integrity', '--json', stdout=out)
+        self.assertTrue(json.loads(out.getvalue())["ok"])
+
+
+class LoadTestReportTests(TestCase):
+    """Tests for the load-test statistics and double-booking check."""
+
+    def test_percentiles_use_nearest_rank(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.05)
+        self.assertEqual(percentile(values, 99), 0.099)
+        self.assertIsNone(percentile([], 95))
+
+    def test_double_booking_counts_shared_slots(self):
+        service = Service.objects.create(
+            name="Cut", duration=timedelta(minutes=30), price=15)
+        user = User.objects.create_user("alice", password="pw")
+        since = timezone.now()
+        slots = make_slots(date.today() + timedelta(days=1), count=3)
+        for pair in (slots[:2], slots[1:]):
+            booking = Booking.objects.create(
+                user=user, service=service, status='pending')
+            booking.timeslots.set(pair)
+        report = LoadTestCommand().double_booking(since)
+        self.assertEqual(report["checked"], 2)
+        self.assertEqual(report["bookings"], 2)
+        self.assertEqual(report["rate"], 1.0)
@@ -1,30 +1,54 @@
+import hashlib
+import json
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.utils.dateparse import parse_date
-from barber.models import Booking, Service, TimeSlot, Review
+from barber.models import Booking, Service, Review
 from datetime import date, datetime, timedelta
-from collections import defaultdict
 from django.utils import timezone
+from . import availability as availability_cache
+from . import schedule
 from .forms import ReviewForm
+from .pagecache import cache_anonymous_page
+from .pagination import keyset_page
+from .sampling import random_reviews
+from .slots import (
+    HELD_SLOT_STATUSES,
+    SlotUnavailable,
+    find_contiguous_slots,
+    required_slot_count,
+    reserve_booking,
+)
 from django.contrib.auth.views import (
     PasswordChangeView,
     PasswordChangeDoneView
 )
 
+# Default and maximum number of days returned by the availability API.
+AVAILABILITY_PAGE_DAYS = 7
+AVAILABILITY_MAX_DAYS = 31
+
+# Number of reviews per page on the Reviews page.
+REVIEWS_PAGE_SIZE = 10
 
+
+@cache_anonymous_page()
 def home(request):
     """Render the home page with the hero section."""
     return render(request, 'home.html')
 
 
+@cache_anonymous_page(timeout=60)
 def about(request):
     """
     Render the About page with establishment details and random reviews.
+    Reviews are drawn from a cached ID list rather than ORDER BY RANDOM().
     """
-    random_reviews = Review.objects.order_by('?')[:3]
-    context = {'random_reviews': random_reviews}
+    context = {'random_reviews': random_reviews(3)}
     return render(request, 'about.html', context)
 
 
@@ -40,7 +64,7 @@ def book_now(request):
     Validates that all fields are provided and the selected date is not in
     the past. Retrieves the selected service and checks for contiguous
     available 15-minute timeslots based on the service duration. If found,
-    creates a booking with status 'pending' and reserves those timeslots.
+    atomically reserves those timeslots and creates a 'pending' booking.
     For editing, if a GET parameter "edit" is provided, the form is
     prepopulated with the existing booking's data. On POST, if the time or
     date is changed, the existing booking is updated.
@@ -53,6 +77,10 @@ def book_now(request):
         booking_id = request.GET.get('edit')
         edit_booking = get_object_or_404(
             Booking, pk=booking_id, user=request.user)
+        if edit_booking.status not in HELD_SLOT_STATUSES:
+            messages.error(
+                request, "Only pending or confirmed bookings can be changed.")
+            return redirect("profile")
 
     if request.method == "POST":
         service_id = request.POST.get("service")
@@ -82,35 +110,22 @@ def book_now(request):
             messages.error(request, "Invalid time format.")
             return redirect("book_now")
 
-        start_datetime = datetime.combine(selected_date, selected_time)
-
         # Determine the number of 15-min slots required.
-        required_slots = int(service.duration.total_seconds() // (15 * 60))
-        if required_slots < 1:
+        if required_slot_count(service) < 1:
             messages.error(request, "Service duration is invalid.")
             return redirect("book_now")
 
-        # Check for available contiguous timeslots.
-        slots_to_book = []
-        available = True
-        for i in range(required_slots):
-            current_slot_start = (
-                start_datetime + timedelta(minutes=15 * i)).time()
-            current_slot_end = (
-                start_datetime + timedelta(minutes=15 * (i + 1))).time()
-            try:
-                slot = TimeSlot.objects.get(
-                    date=selected_date,
-                    start_time=current_slot_start,
-                    end_time=current_slot_end,
-                    status="available"
-                )
-                slots_to_book.append(slot)
-            except TimeSlot.DoesNotExist:
-                available = False
-                break
-
-        if not available or len(slots_to_book) != required_slots:
+        if schedule.is_enabled():
+            # Interval engine: check free time, no TimeSlot rows involved.
+            slots_to_book = None
+            available = schedule.is_free(
+                selected_date, selected_time, service, booking=edit_booking)
+        else:
+            # Check for available contiguous timeslots in a single query.
+            slots_to_book = find_contiguous_slots(
+                selected_date, selected_time, service, booking=edit_booking)
+            available = slots_to_book is not None
+        if not available:
             messages.error(
                 request,
                 (
@@ -120,67 +135,94 @@ def book_now(request):
             )
             return redirect("book_now")
 
-        if edit_booking:
-            for old_slot in edit_booking.timeslots.all():
-                old_slot.status = "available"
-                old_slot.save()
-
-            # Update the booking with the new service and timeslots.
-            edit_booking.service = service
-            edit_booking.timeslots.clear()
-            edit_booking.status = "pending"
-            edit_booking.save()
-
-            edit_booking.timeslots.set(slots_to_book)
-            for slot in slots_to_book:
-                slot.status = "pending"
-                slot.save()
-            booking = edit_booking
-        else:
-            # Create a new booking instance and save it to get a primary key.
-            booking = Booking(user=request.user,
-                              service=service, status="pending")
-            booking.save()
-            booking.timeslots.set(slots_to_book)
-            for slot in slots_to_book:
-                slot.status = "pending"
-                slot.save()
+        try:
+            if slots_to_book is None:
+                schedule.reserve_booking(request.user, service, selected_date,
+                                         selected_time, booking=edit_booking)
+            else:
+                reserve_booking(request.user, service, slots_to_book,
+                                booking=edit_booking)
+        except SlotUnavailable:
+            messages.error(
+                request,
+                (
+                    "Sorry, those time slots were just taken. Please choose "
+                    "a different time."
+                )
+            )
+            return redirect("book_now")
 
         messages.success(
             request, "Booking request received. Await confirmation.")
         return redirect("profile")
 
-    # Build a dictionary of available timeslots grouped by date.
-    # Filter out timeslots that have already passed today.
-    timeslots_by_date = defaultdict(list)
-    today = date.today()
-    current_time = datetime.now().time()
-    available_slots = TimeSlot.objects.filter(status='available')
-    for slot in available_slots:
-        # Check if time slot is earlier or equal to current time if so skip
-        if slot.date == today and slot.start_time <= current_time:
-            continue
-        timeslots_by_date[str(slot.date)].append(
-            slot.start_time.strftime("%H:%M"))
-
     # Prepopulate initial form data if editing.
     initial = {}
     if edit_booking:
-        slots = edit_booking.timeslots.all().order_by("start_time")
-        if slots.exists():
-            initial["service"] = edit_booking.service.id
-            initial["date"] = slots.first().date.strftime("%Y-%m-%d")
-            initial["time"] = slots.first().start_time.strftime("%H:%M")
+        bounds = edit_booking.get_time_bounds()
+        if bounds:
+            initial["service"] = edit_booking.service_id
+            initial["date"] = bounds[0].strftime("%Y-%m-%d")
+            initial["time"] = bounds[1].strftime("%H:%M")
 
     context = {
         "services": services_qs,
-        "timeslots_by_date": dict(timeslots_by_date),
         "initial": initial,
         "edit_booking": edit_booking,
     }
     return render(request, "booking.html", context)
 
 
+@login_required
+def availability(request):
+    """
+    Return the valid start times for a service over a date range as JSON.
+    Expects "service", an optional "start" date (default today) and an
+    optional number of "days" (default 7, at most 31). The response holds
+    one entry per date and the start date of the following page. An ETag
+    is sent so repeat polls with If-None-Match get an empty 304.
+    """
+    try:
+        service = Service.objects.get(pk=int(request.GET.get("service")))
+    except (TypeError, ValueError, Service.DoesNotExist):
+        return JsonResponse({"error": "Unknown service."}, status=400)
+
+    start_str = request.GET.get("start")
+    try:
+        start_date = parse_date(start_str) if start_str else date.today()
+    except ValueError:
+        start_date = None
+    if start_date is None:
+        return JsonResponse({"error": "Invalid start date."}, status=400)
+    try:
+        days = int(request.GET.get("days", AVAILABILITY_PAGE_DAYS))
+    except ValueError:
+        return JsonResponse({"error": "Invalid number of days."}, status=400)
+    days = min(max(days, 1), AVAILABILITY_MAX_DAYS)
+    try:
+        next_date = start_date + timedelta(days=days)
+    except OverflowError:
+        return JsonResponse({"error": "Invalid start date."}, status=400)
+    end_date = next_date - timedelta(days=1)
+    engine = schedule if schedule.is_enabled() else availability_cache
+
+    payload = {
+        "service": service.id,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "next": next_date.isoformat(),
+        "dates": engine.valid_start_times(
+            required_slot_count(service), start_date, end_date),
+    }
+    body = json.dumps(payload, sort_keys=True)
+    etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
 def register(request):
     """
     Registers a new user by validating input and creating a user if valid.
@@ -218,26 +260,19 @@ def register(request):
 def profile(request):
     """
     Custom profile view for displaying the logged-in user's account details
-    and their bookings. Retrieves all bookings for the user, lazy-updates up
-    to 50 confirmed bookings to 'completed' if their earliest timeslot is in
-    the past, and separates bookings into upcoming and past using the actual
-    end datetime.
+    and their bookings. The view is read-only: bookings are loaded in one
+    query ordered by their starts_at column and split into upcoming and
+    past using ends_at. Persisting completed statuses is left
+    to the mark_completed cron job.
     """
     now = timezone.now()
 
-    confirmed_bookings = Booking.objects.filter(
-        user=request.user, status='confirmed'
-    ).order_by('timeslots__date')[:50]
-
-    for booking in confirmed_bookings:
-        end_dt = booking.get_end_datetime()
-        if end_dt and end_dt < now:
-            booking.status = 'completed'
-            booking.save()
-
-    all_bookings = Booking.objects.filter(
-        user=request.user
-    ).exclude(status='cancelled').distinct().order_by('timeslots__date')
+    all_bookings = (
+        Booking.objects.filter(user=request.user)
+        .exclude(status='cancelled')
+        .select_related('service', 'review')
+        .order_by('starts_at')
+    )
 
     upcoming_bookings = []
     past_bookings = []
@@ -249,7 +284,7 @@ def profile(request):
         else:
             upcoming_bookings.append(booking)
 
-    user_reviews = request.user.reviews.all()
+    user_reviews = request.user.reviews.select_related('booking__service')
 
     context = {
         'username': request.user.username,
@@ -268,13 +303,15 @@ class CustomPasswordChangeDoneView(PasswordChangeDoneView):
     template_name = 'registration/password_change_done.html'
 
 
+@cache_anonymous_page()
 def services(request):
     """
-    Render the services page displaying all available barber services.
-    If no services exist, display a warning message.
+    Render the services page displaying all available barber services
+    with their stored rating summaries. If no services exist, display a
+    warning message.
     """
-    services_qs = Service.objects.all()
-    if not services_qs.exists():
+    services_qs = Service.objects.select_related('rating_summary')
+    if not services_qs:
         messages.warning(request, "No services available at this time.")
     return render(request, 'services.html', {'services': services_qs})
 
@@ -293,12 +330,34 @@ def booking_cancel(request, booking_id):
     return redirect("profile")
 
 
+@cache_anonymous_page()
 def reviews(request):
     """
-    Display all reviews on a dedicated Reviews page.
+    Display reviews on a dedicated Reviews page, newest first, one page
+    at a time using a cursor on (created_at, id). With ?format=json the
+    page is returned as JSON for infinite scrolling.
     """
-    all_reviews = Review.objects.all().order_by('-created_at')
-    context = {'all_reviews': all_reviews}
+    page, next_cursor = keyset_page(
+        Review.objects.select_related('booking__service', 'user'),
+        cursor=request.GET.get('cursor'),
+        page_size=REVIEWS_PAGE_SIZE,
+    )
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'reviews': [
+                {
+                    'id': review.id,
+                    'service': review.booking.service.name,
+                    'rating': review.rating,
+                    'comment': review.comment,
+                    'username': review.user.username,
+                    'created_at': review.created_at.isoformat(),
+                }
+                for review in page
+            ],
+            'next': next_cursor,
+        })
+    context = {'all_reviews': page, 'next_cursor': next_cursor}
     return render(request, 'reviews.html', context)
 
 
@@ -323,11 +382,14 @@ def create_review(request, booking_id):
     """
     Create a review for a completed booking.
 
-    Only allow review creation if the booking is completed and no review
-    exists. Display the ReviewForm with star rating and comment.
+    Only allow review creation if the booking is completed (or confirmed
+    and already over) and no review exists. Display the ReviewForm with
+    star rating and comment.
     """
-    booking = get_object_or_404(Booking, pk=booking_id, user=request.user)
-    if booking.status != 'completed':
+    booking = get_object_or_404(
+        Booking.objects.select_related('service'),
+        pk=booking_id, user=request.user)
+    if booking.effective_status != 'completed':
         messages.error(request, "You can only review a completed booking.")
         return redirect("profile")
     if hasattr(booking, 'review'):
@@ -341,6 +403,10 @@ def create_review(request, booking_id):
             review.booking = booking
             review.user = request.user
             review.save()
+            if booking.status != 'completed':
+                # The booking ended before the completion sweep ran.
+                Booking.objects.filter(pk=booking.pk).update(
+                    status='completed', updated_at=timezone.now())
             messages.success(request, "Review submitted successfully.")
             return redirect("profile")
     else:
@@ -356,7 +422,9 @@ def edit_review(request, review_id):
 
     Display the ReviewForm prepopulated with the existing review data.
     """
-    review = get_object_or_404(Review, pk=review_id, user=request.user)
+    review = get_object_or_404(
+        Review.objects.select_related('booking__service'),
+        pk=review_id, user=request.user)
     if request.method == "POST":
         form = ReviewForm(request.POST, instance=review)
         if form.is_valid():
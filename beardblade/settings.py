@@ -49,10 +49,26 @@ INSTALLED_APPS = [
 
 # Cron job configuration for django-crontab
 CRONJOBS = [
-    ('0 0 * * *', 'django.core.management.call_command', ['timeslots']),
+    ('0 0 * * *', 'django.core.management.call_command', ['timeslots'],
+     {'quiet': True}),
     ('0 * * * *', 'django.core.management.call_command', ['mark_completed']),
+    ('30 0 * * *', 'django.core.management.call_command',
+     ['timeslot_retention']),
 ]
 
+# Days of past timeslots kept in the live TimeSlot table; older unbooked
+# slots are moved to TimeSlotArchive by the timeslot_retention command.
+TIMESLOT_RETENTION_DAYS = 30
+
+# Seconds a cached day of booking availability stays valid. Entries are
+# also invalidated explicitly whenever a booking touches that day.
+AVAILABILITY_CACHE_TIMEOUT = 300
+
+# 'timeslots' books pre-generated 15-minute TimeSlot rows; 'intervals'
+# derives free time from OpeningHours minus existing bookings instead.
+BOOKING_AVAILABILITY_ENGINE = os.environ.get(
+    'BOOKING_AVAILABILITY_ENGINE', 'timeslots')
+
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -68,17 +84,27 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'beardblade.urls'
 
+# Templates are compiled once per process by the cached loader; with
+# explicit loaders APP_DIRS must be off, so the app directories loader is
+# listed instead.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'barber.context_processors.content_versions',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -98,8 +124,61 @@ WSGI_APPLICATION = 'beardblade.wsgi.application'
 # }
 
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them
+# after every request, "None" keeps them forever) and checked before reuse.
+# Set DB_EXTERNAL_POOLER when DATABASE_URL points at a transaction pooler
+# such as PgBouncer, which cannot hold server-side cursors open.
+
+DB_CONN_MAX_AGE = os.environ.get("DB_CONN_MAX_AGE", "60")
+
 DATABASES = {
-    'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
+    'default': dj_database_url.parse(
+        os.environ.get("DATABASE_URL"),
+        conn_max_age=(None if DB_CONN_MAX_AGE == "None"
+                      else int(DB_CONN_MAX_AGE)),
+    )
+}
+DATABASES['default']['CONN_HEALTH_CHECKS'] = (
+    os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True")
+if os.environ.get("DB_EXTERNAL_POOLER"):
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache and a redis://
+# URL) so every worker sees the same entries and invalidations.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'beardblade'),
+    }
+}
+
+# Seconds an anonymous home/about/services/reviews page stays cached.
+# Template fragments are keyed on content versions (see barber.pagecache)
+# and are retired by a version bump rather than by expiry.
+PUBLIC_PAGE_CACHE_TIMEOUT = 600
+
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'barber': {
+            'handlers': ['console'],
+            'level': os.environ.get('BARBER_LOG_LEVEL', 'INFO'),
+        },
+    },
 }
 
 
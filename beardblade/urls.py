@@ -13,6 +13,8 @@ urlpatterns = [
     path('about/', barber_views.about, name='about'),
     path('services/', barber_views.services, name='services'),
     path('book/', barber_views.book_now, name='book_now'),
+    path('book/availability/', barber_views.availability,
+         name='availability'),
     path('accounts/profile/', barber_views.profile, name='profile'),
     path("accounts/register/", barber_views.register, name="register"),
 
@@ -53,47 +53,87 @@ document.addEventListener("DOMContentLoaded", function () {
         });
     });
 
-    // Retrieve timeslots data from the embedded JSON
-    const timeslotsDataElem = document.getElementById("timeslots-data");
-    if (timeslotsDataElem) {
-        const timeslotsByDate = JSON.parse(timeslotsDataElem.textContent);
+    // Booking form: load valid start times from the availability API
+    const bookingForm = document.getElementById("booking-form");
+    if (bookingForm) {
+        const availabilityUrl = bookingForm.dataset.availabilityUrl;
+        const serviceSelect = document.getElementById("service");
         const dateSelect = document.getElementById("date");
         const timeSelect = document.getElementById("time");
+        // Start times already fetched, keyed by service then date
+        const startTimes = {};
 
-        // Populate time dropdown based on selected date
-        function populateTimeOptions(selectedDate) {
+        function showNoTimeSlots() {
+            // Trigger the Bootstrap modal
+            const modalElement = document.getElementById("noTimeSlotsModal");
+            const noTimeSlotsModal = new bootstrap.Modal(modalElement);
+            noTimeSlotsModal.show();
             timeSelect.innerHTML = "";
-            if (timeslotsByDate[selectedDate]) {
-                timeslotsByDate[selectedDate].forEach(function (timeStr) {
-                    const option = document.createElement("option");
-                    option.value = timeStr;
-                    option.textContent = timeStr;
-                    timeSelect.appendChild(option);
-                });
-            }
+            const option = document.createElement("option");
+            option.value = "";
+            option.textContent = "No available time slots";
+            timeSelect.appendChild(option);
         }
-        // On page load populate time options for the current date
-        if (dateSelect && dateSelect.value) {
-            populateTimeOptions(dateSelect.value);
+
+        // Populate time dropdown from the fetched start times
+        function populateTimeOptions(times) {
+            timeSelect.innerHTML = "";
+            times.forEach(function (timeStr) {
+                const option = document.createElement("option");
+                option.value = timeStr;
+                option.textContent = timeStr;
+                timeSelect.appendChild(option);
+            });
         }
-        // Update time options when the date selection changes
-        if (dateSelect) {
-            dateSelect.addEventListener("change", function () {
-                if (!timeslotsByDate[this.value]) {
-                    // Trigger the Bootstrap modal instead
-                    const modalElement = document.getElementById("noTimeSlotsModal");
-                    const noTimeSlotsModal = new bootstrap.Modal(modalElement);
-                    noTimeSlotsModal.show();
-                    timeSelect.innerHTML = "";
-                    const option = document.createElement("option");
-                    option.value = "";
-                    option.textContent = "No available time slots";
-                    timeSelect.appendChild(option);
-                } else {
-                    populateTimeOptions(this.value);
-                }
+
+        // Fetch one page of dates starting at the selected date
+        function loadStartTimes(serviceId, selectedDate) {
+            const cached = startTimes[serviceId] || {};
+            if (cached[selectedDate]) {
+                return Promise.resolve(cached[selectedDate]);
+            }
+            const params = new URLSearchParams({
+                service: serviceId,
+                start: selectedDate,
             });
+            return fetch(availabilityUrl + "?" + params.toString(), {
+                headers: { "Accept": "application/json" },
+            })
+                .then(function (response) {
+                    if (!response.ok) {
+                        return { dates: {} };
+                    }
+                    return response.json();
+                })
+                .then(function (data) {
+                    startTimes[serviceId] = Object.assign(cached, data.dates);
+                    return startTimes[serviceId][selectedDate] || [];
+                });
+        }
+
+        function updateTimeOptions(showModal) {
+            if (!serviceSelect.value || !dateSelect.value) {
+                return;
+            }
+            loadStartTimes(serviceSelect.value, dateSelect.value)
+                .then(function (times) {
+                    if (times.length === 0 && showModal) {
+                        showNoTimeSlots();
+                    } else {
+                        populateTimeOptions(times);
+                    }
+                });
         }
+
+        // On page load populate time options for the current date
+        updateTimeOptions(false);
+        // Update time options when the date or service changes
+        dateSelect.addEventListener("change", function () {
+            updateTimeOptions(true);
+        });
+        serviceSelect.addEventListener("change", function () {
+            updateTimeOptions(true);
+        });
     }
 
     // Delete Review modal